@@ -8,26 +8,63 @@ Supports multiple output formats:
 - Standard OG image (1200x630) - use --og-size
 - Circuit pattern style - use --circuit
 - JSON metadata export - use --json
+- Batch mode for many URLs - use --batch <file> (or - for stdin)
 """
 
 import sys
-import requests
-from bs4 import BeautifulSoup
-from PIL import Image, ImageDraw, ImageFont
+import importlib
+import importlib.util
 import textwrap
 import io
+import base64
 import re
+import codecs
+import html as html_lib
+import time
+import hashlib
+import tempfile
+import shutil
+import socket
+import sqlite3
+from email.utils import parsedate_to_datetime
 import json
 import os
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
+from html.parser import HTMLParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import argparse
-
-# Try to import Playwright, fall back gracefully if not available
-try:
-    from playwright.sync_api import sync_playwright
-    PLAYWRIGHT_AVAILABLE = True
-except ImportError:
-    PLAYWRIGHT_AVAILABLE = False
+import atexit
+import collections
+import functools
+import itertools
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Heavy dependencies are imported inside the functions that use them, so
+# --help, --manual or a metadata cache hit don't pay for them. They remain
+# attributes of this package, imported on first access (PEP 562).
+_LAZY_MODULES = {
+    'requests': 'requests',
+    'asyncio': 'asyncio',
+    'Image': 'PIL.Image',
+    'ImageDraw': 'PIL.ImageDraw',
+    'ImageFont': 'PIL.ImageFont',
+    'ImageFile': 'PIL.ImageFile',
+}
+
+def __getattr__(name):
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_MODULES[name])
+    globals()[name] = module
+    return module
+
+# Playwright is only imported when the fallback actually fires
+PLAYWRIGHT_AVAILABLE = importlib.util.find_spec('playwright') is not None
+
+# aiohttp powers the optional asyncio fetch engine (--async)
+AIOHTTP_AVAILABLE = importlib.util.find_spec('aiohttp') is not None
 
 # Standard OG image dimensions (recommended by social platforms)
 OG_STANDARD_WIDTH = 1200
@@ -37,102 +74,756 @@ OG_STANDARD_HEIGHT = 630
 COMPACT_WIDTH = 722
 COMPACT_HEIGHT = 144
 
-def extract_og_data_with_playwright(url):
-    """Extract Open Graph data using Playwright for JavaScript-rendered pages."""
-    if not PLAYWRIGHT_AVAILABLE:
-        print("Playwright not available. Install with: pip install playwright")
-        return None
+# Number of URLs processed in parallel in batch mode
+DEFAULT_BATCH_CONCURRENCY = 8
+
+# Encoded output formats and their content types
+PREVIEW_CONTENT_TYPES = {
+    'png': 'image/png',
+    'pdf': 'application/pdf',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'avif': 'image/avif',
+    'svg': 'image/svg+xml',
+}
+
+# Output encoders: Pillow save() options per format and --effort, which trades
+# encode CPU for bytes. 'balanced' keeps Pillow's defaults (PNG zlib level 6),
+# except that JPEGs are progressive (baseline with 'fast'). --quality overrides the lossy
+# formats' quality (for PDF, that of the embedded JPEG), --png-compression
+# the PNG zlib level.
+ENCODER_EFFORTS = ('fast', 'balanced', 'small')
+DEFAULT_ENCODER_EFFORT = 'balanced'
+ENCODER_PRESETS = {
+    'png': {
+        'fast': {'compress_level': 1},
+        'balanced': {'compress_level': 6},
+        'small': {'compress_level': 9, 'optimize': True},
+    },
+    'webp': {
+        'fast': {'quality': 80, 'method': 0},
+        'balanced': {'quality': 80, 'method': 4},
+        'small': {'quality': 80, 'method': 6},
+    },
+    'jpeg': {
+        'fast': {'quality': 85},
+        'balanced': {'quality': 85, 'progressive': True},
+        'small': {'quality': 85, 'progressive': True},
+    },
+    'avif': {
+        'fast': {'quality': 75, 'speed': 10},
+        'balanced': {'quality': 75, 'speed': 6},
+        'small': {'quality': 75, 'speed': 4},
+    },
+    'pdf': {effort: {'resolution': 100.0} for effort in ENCODER_EFFORTS},
+}
+
+# PDF bundle (--pdf-bundle): sheet sizes in points for --cards-per-page above 1
+PDF_PAGE_SIZES = {'a4': (595, 842), 'letter': (612, 792)}
+DEFAULT_PDF_PAGE_SIZE = 'a4'
+PDF_BUNDLE_MARGIN = 36   # Points around and between cards on a sheet
+
+# Archive sink (--archive): batch outputs streamed into one tar or zip file
+ARCHIVE_FORMATS = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar.gz', '.tgz': 'tar.gz'}
+ARCHIVE_MANIFEST = 'manifest.json'
+ARCHIVE_DEFLATED_EXTENSIONS = ('.json', '.svg')   # Zip members worth compressing again
+
+# SVG output is drawn as vector markup rather than encoded; og:image is
+# embedded as a data URI or linked by URL (--svg-images)
+VECTOR_FORMATS = ('svg',)
+SVG_IMAGE_MODES = ('embed', 'link')
+DEFAULT_SVG_IMAGES = 'embed'
+
+# Multi-output mode (--sizes/--formats): layouts and encodings rendered from one fetch
+OUTPUT_SIZES = ('compact', 'og')
+OUTPUT_FORMATS = tuple(PREVIEW_CONTENT_TYPES)
+
+# HTTP service mode (linkpreview serve)
+DEFAULT_SERVE_HOST = '127.0.0.1'
+DEFAULT_SERVE_PORT = 8080
+SERVE_FORMATS = tuple(PREVIEW_CONTENT_TYPES) + ('json',)
+
+# Batch modes: URLs handed to the fetch pool per thread; the rest wait their turn in the list
+FETCH_QUEUE_PER_THREAD = 2
+
+# Pipeline mode: fetched URLs allowed to wait for each render process before fetching pauses
+RENDER_QUEUE_PER_PROCESS = 2
+
+# HTTP connection pool tuning
+DEFAULT_POOL_HOSTS = 100      # Number of per-host pools kept alive
+DEFAULT_POOL_SIZE = 16        # Connections kept alive per host
+DEFAULT_RETRIES = 2           # Retries on connection errors and 429/5xx responses
+
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Enhanced headers to mimic real browser
+BROWSER_HEADERS = {
+    'User-Agent': BROWSER_USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0',
+}
+
+# Streaming page fetch: stop reading once </head> is seen, or at this many bytes
+DEFAULT_MAX_HEAD_BYTES = 512 * 1024
+HEAD_CHUNK_SIZE = 16 * 1024
+
+# HTML parser backends: BeautifulSoup with lxml or html.parser, or a regex tag scanner
+PARSER_BACKENDS = ('lxml', 'html.parser', 'scan')
+DEFAULT_PARSER = 'lxml'
+
+# <link rel> values used as a fallback image, in order of preference
+FAVICON_RELS = ('icon', 'shortcut icon', 'apple-touch-icon', 'apple-touch-icon-precomposed')
+
+# Persistent caches live under this directory unless --cache-dir is given
+DEFAULT_CACHE_DIR = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                                 'linkpreview')
+
+# Metadata cache lifetimes (seconds) for successful and failed extractions
+DEFAULT_METADATA_TTL = 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 15 * 60
+
+# Fetch failures worth caching as negative entries: they won't pass on a retry
+PERMANENT_HTTP_STATUSES = (404, 410)
+PERMANENT_DNS_ERRORS = tuple(getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA')
+                             if hasattr(socket, name))
+
+# Byte budget of the on-disk image cache before least recently used entries go
+DEFAULT_IMAGE_CACHE_SIZE = 256 * 1024 * 1024
+
+# Byte budget of the on-disk HTTP cache of page heads; pruning goes down to
+# HTTP_CACHE_PRUNE_TO of it so the directory isn't rescanned on every store
+DEFAULT_HTTP_CACHE_SIZE = 64 * 1024 * 1024
+HTTP_CACHE_PRUNE_TO = 0.9
+
+# Image dimension probe: read at most this many bytes looking for the header
+DEFAULT_PROBE_BYTES = 64 * 1024
+PROBE_CHUNK_SIZE = 4 * 1024
+
+# How og:image is judged for the image-only layout: by its probed pixel size or by URL alone
+IMAGE_SCORING_MODES = ('size', 'url')
+DEFAULT_IMAGE_SCORING = 'size'
+
+# Image decoding: downscale in steps of this factor (Pillow's reducing_gap), and
+# refuse to decode anything that would still be larger than this many pixels
+RESAMPLE_REDUCING_GAP = 3.0
+MAX_DECODE_PIXELS = 50_000_000
+
+# Per-request overrides used when downloading images
+IMAGE_HEADERS = {
+    'Accept': 'image/avif,image/webp,image/apng,image/*,*/*;q=0.8',
+    'Sec-Fetch-Dest': 'image',
+    'Sec-Fetch-Mode': 'no-cors',
+}
+
+# Font files tried in order for the default sans family, per weight (bold or not)
+DEFAULT_FONT_FAMILY = 'sans'
+SANS_FONT_PATHS = {
+    False: (
+        # macOS fonts
+        "/System/Library/Fonts/Supplemental/Arial.ttf",
+        "/System/Library/Fonts/ArialHB.ttc",
+        "/System/Library/Fonts/Helvetica.ttc",
+        # Linux fonts
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
+        # Windows fonts
+        "C:/Windows/Fonts/arial.ttf",
+    ),
+    True: (
+        "/System/Library/Fonts/Supplemental/Arial Bold.ttf",
+        "/System/Library/Fonts/ArialHB.ttc",
+        "/System/Library/Fonts/Helvetica.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf",
+        "C:/Windows/Fonts/arialbd.ttf",
+    ),
+}
+FONT_EXTENSIONS = ('.ttf', '.otf', '.ttc')
+
+# SVG output names the same faces as SANS_FONT_PATHS, for the viewer to resolve
+SVG_FONT_FAMILY = "Arial, Helvetica, 'DejaVu Sans', 'Liberation Sans', FreeSans, sans-serif"
+
+# Pre-rendered circuit backgrounds and card chrome kept per process
+CARD_CACHE_SIZE = 64
+
+# Playwright browser pool tuning
+DEFAULT_BROWSER_MAX_PAGES = 4          # Pages rendered concurrently by one browser
+DEFAULT_BROWSER_RECYCLE_AFTER = 200    # Pages served before the browser is relaunched
+DEFAULT_BROWSER_WAIT_TAGS = ('og:title',)   # Return as soon as one of these meta tags exists
+DEFAULT_BROWSER_TAG_TIMEOUT = 2000     # ms to wait for those tags before giving up
+
+# Resource types never needed to read <meta> tags in the head
+BLOCKED_RESOURCE_TYPES = frozenset(['image', 'media', 'font', 'stylesheet'])
+
+# Common public suffixes of two labels, under which each registered domain is its
+# own site (www.bbc.co.uk and tracker.co.uk are different sites)
+MULTI_LABEL_SUFFIXES = frozenset([
+    'ac.uk', 'co.uk', 'gov.uk', 'ltd.uk', 'me.uk', 'net.uk', 'nhs.uk', 'org.uk', 'plc.uk', 'sch.uk',
+    'asn.au', 'com.au', 'edu.au', 'gov.au', 'id.au', 'net.au', 'org.au',
+    'ac.nz', 'co.nz', 'govt.nz', 'net.nz', 'org.nz',
+    'ac.jp', 'co.jp', 'go.jp', 'ne.jp', 'or.jp',
+    'co.kr', 'ne.kr', 'or.kr',
+    'ac.in', 'co.in', 'firm.in', 'gov.in', 'net.in', 'org.in',
+    'ac.za', 'co.za', 'gov.za', 'org.za',
+    'com.br', 'gov.br', 'net.br', 'org.br',
+    'com.cn', 'edu.cn', 'gov.cn', 'net.cn', 'org.cn',
+    'com.hk', 'edu.hk', 'gov.hk', 'net.hk', 'org.hk',
+    'com.tw', 'edu.tw', 'gov.tw', 'net.tw', 'org.tw',
+    'com.sg', 'edu.sg', 'gov.sg', 'org.sg',
+    'com.mx', 'gob.mx', 'org.mx',
+    'ac.il', 'co.il', 'org.il',
+    'ac.id', 'co.id', 'go.id', 'or.id',
+    'ac.th', 'co.th', 'go.th',
+    'com.ar', 'com.eg', 'com.my', 'com.ng', 'com.ph', 'com.pk', 'com.sa', 'com.tr', 'com.ua',
+    'com.vn', 'gov.tr', 'org.tr',
+    # Hosting platforms that give every customer a subdomain
+    'appspot.com', 'blogspot.com', 'github.io', 'gitlab.io', 'herokuapp.com', 'netlify.app',
+    'pages.dev', 'vercel.app',
+])
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+_default_browser_pool = None
+_default_browser_pool_lock = threading.Lock()
+
+_default_font_registry = None
+_default_font_registry_lock = threading.Lock()
+
+_missing_parsers = set()
+
+def create_http_session(pool_size=DEFAULT_POOL_SIZE, pool_hosts=DEFAULT_POOL_HOSTS,
+                        retries=DEFAULT_RETRIES):
+    """Create a keep-alive HTTP session with a tuned connection pool and retries.
+
+    One session is meant to be shared by page fetches, favicon probes and image
+    downloads so connections to the same host are reused.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.headers.update(BROWSER_HEADERS)
+
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_http_session():
+    """Return the process-wide shared HTTP session, creating it on first use."""
+    global _default_session
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = create_http_session()
+        return _default_session
+
+def fetch_image_data(image_url, session=None, image_cache=None):
+    """Download image bytes through the shared session.
+
+    With an ImageCache, cached bytes are used and new downloads are stored.
+    """
+    image_data = image_cache.get(image_url) if image_cache else None
+
+    if image_data is None:
+        session = session or get_http_session()
+        response = session.get(image_url, headers=IMAGE_HEADERS, timeout=10)
+        response.raise_for_status()
+        image_data = response.content
+        if image_cache:
+            image_cache.put(image_url, image_data)
+
+    return image_data
+
+class ResolvedImage:
+    """An og:image downloaded once and decoded on demand, shared between renderers.
+
+    A failed download or decode is kept as the error, so every renderer that
+    receives it falls back straight away instead of fetching again.
+
+    Decoding is scaled to the output: JPEGs are decoded with draft() at the
+    smallest DCT scale (1/2, 1/4, 1/8) that still leaves RESAMPLE_REDUCING_GAP
+    times the target size, and each scale is decoded at most once. Decoded
+    images are shared - use fitted()/resized(), which return new images.
+    """
+
+    def __init__(self, url, data=None, error=None):
+        self.url = url
+        self.data = data
+        self.error = error
+        self._decoded = {}
+        self._size = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Only the bytes travel to render processes; decoding is redone there
+        error = None if self.error is None else RuntimeError(str(self.error))
+        return {'url': self.url, 'data': self.data, 'error': error}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def size(self):
+        """(width, height) read from the image header, without a full decode."""
+        from PIL import Image
+
+        with self._lock:
+            if self.error is None and self._size is None:
+                try:
+                    self._size = Image.open(io.BytesIO(self.data)).size
+                except Exception as e:
+                    self.error = e
+            if self.error is not None:
+                raise self.error
+            return self._size
+
+    @property
+    def image(self):
+        """The image decoded at full resolution; raises the stored error for a failed image."""
+        return self._decode()[0]
+
+    def _decode(self, target=None):
+        """Return (image, box) decoded just large enough to be resampled to target.
+
+        box is the source region in decoded coordinates, to pass on to resize().
+        """
+        from PIL import Image
 
+        with self._lock:
+            if self.error is not None:
+                raise self.error
+
+            try:
+                image = Image.open(io.BytesIO(self.data))
+                self._size = image.size
+                box = None
+                if target:
+                    drafted = image.draft(None, (int(target[0] * RESAMPLE_REDUCING_GAP),
+                                                 int(target[1] * RESAMPLE_REDUCING_GAP)))
+                    if drafted is not None:
+                        box = drafted[1]
+            except Exception as e:
+                self.error = e
+                raise
+
+            if image.size in self._decoded:
+                return self._decoded[image.size]
+            if target:
+                # A larger scale decoded for another output size serves this one too
+                larger = [size for size in self._decoded
+                          if size[0] >= image.size[0] and size[1] >= image.size[1]]
+                if larger:
+                    return self._decoded[min(larger)]
+
+            width, height = image.size
+            if width * height > MAX_DECODE_PIXELS:
+                raise ValueError(f"Image too large to decode: {width}x{height} "
+                                 f"(limit {MAX_DECODE_PIXELS} pixels)")
+
+            try:
+                image.load()
+            except Exception as e:
+                self.error = e
+                raise
+
+            self._decoded[image.size] = (image, box)
+            return image, box
+
+    def resized(self, size):
+        """A new image of exactly size, decoded no larger than needed."""
+        from PIL import Image
+
+        image, box = self._decode(size)
+        return image.resize(size, Image.Resampling.LANCZOS, box=box,
+                            reducing_gap=RESAMPLE_REDUCING_GAP)
+
+    def fitted(self, box):
+        """A new image scaled down to fit within box, keeping its aspect ratio."""
+        width, height = self.size
+        scale = min(box[0] / width, box[1] / height)
+        if scale >= 1:
+            return self.image.copy()
+        return self.resized((max(1, round(width * scale)), max(1, round(height * scale))))
+
+def resolve_image(image_url, session=None, image_cache=None):
+    """Download an image once and wrap it (or the failure) in a ResolvedImage."""
     try:
-        print("Attempting JavaScript-aware extraction with Playwright...")
+        return ResolvedImage(image_url, data=fetch_image_data(image_url, session=session,
+                                                              image_cache=image_cache))
+    except Exception as e:
+        return ResolvedImage(image_url, error=e)
 
-        with sync_playwright() as p:
-            # Launch browser in headless mode
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+class ImageProbe:
+    """Feed the first bytes of an image until Pillow has parsed its header.
 
-            # Set realistic user agent
-            page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
+    size and format are set once the header is understood. done also turns
+    true after max_bytes, so a probe never becomes a full download.
+    """
 
-            # Navigate to page with shorter timeout for faster response
-            try:
-                page.goto(url, wait_until='domcontentloaded', timeout=15000)  # 15 second timeout
-            except:
-                # If that fails, try with even shorter timeout
-                print("DOM content loaded timeout, trying with load event...")
-                page.goto(url, wait_until='load', timeout=10000)
+    def __init__(self, max_bytes=DEFAULT_PROBE_BYTES):
+        from PIL import ImageFile
 
-            # Wait for any late-loading content (reduced wait time)
-            page.wait_for_timeout(1000)
+        self.max_bytes = max_bytes
+        self.read = 0
+        self.size = None
+        self.format = None
+        self._parser = ImageFile.Parser()
 
-            # Get the final HTML after JavaScript execution
-            html_content = page.content()
+    @property
+    def done(self):
+        return self.size is not None or self.read >= self.max_bytes
 
-            browser.close()
+    def feed(self, chunk):
+        self.read += len(chunk)
+        try:
+            self._parser.feed(chunk)
+        except Exception:
+            return
+        if self._parser.image is not None:
+            self.size = self._parser.image.size
+            self.format = self._parser.image.format
+
+def _probe_result(image_url, probe):
+    if probe.size is None:
+        print(f"Could not find image size in the first {probe.read} bytes of {image_url}")
+        return None
+    print(f"Probed image: {probe.format} {probe.size[0]}x{probe.size[1]} ({probe.read} bytes read)")
+    return probe.size
 
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(html_content, 'html.parser')
+def _cached_image_size(image_url, image_cache):
+    from PIL import Image
 
-        # Extract OG data with fallbacks
-        og_data = {}
+    cached = image_cache.get(image_url) if image_cache else None
+    return Image.open(io.BytesIO(cached)).size if cached is not None else None
 
-        # Title
-        og_title = soup.find('meta', property='og:title')
-        if og_title:
-            og_data['title'] = og_title.get('content', '')
-        else:
-            title_tag = soup.find('title')
-            og_data['title'] = title_tag.text.strip() if title_tag else 'No Title'
+def declared_image_size(og_data):
+    """og:image:width/height as stated by the page, or None."""
+    width, height = og_data.get('image_width'), og_data.get('image_height')
+    return (width, height) if width and height else None
 
-        # Description
-        og_desc = soup.find('meta', property='og:description')
-        if og_desc:
-            og_data['description'] = og_desc.get('content', '')
-        else:
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            og_data['description'] = meta_desc.get('content', 'No description available') if meta_desc else 'No description available'
+def probe_image_size(image_url, session=None, image_cache=None, max_bytes=DEFAULT_PROBE_BYTES):
+    """Return (width, height) of an image by reading only the first bytes of it.
 
-        # Image - try multiple sources
-        og_data['image'] = None
+    A Range request asks for max_bytes at most, and the stream is closed as
+    soon as the header is parsed, so servers ignoring Range cost no more.
+    Cached image bytes are used without a request. Returns None if no header
+    is found within max_bytes.
+    """
+    cached_size = _cached_image_size(image_url, image_cache)
+    if cached_size:
+        return cached_size
 
-        # First try Open Graph image
-        og_image = soup.find('meta', property='og:image')
-        if og_image:
-            image_url = og_image.get('content', '')
-            og_data['image'] = urljoin(url, image_url)
+    session = session or get_http_session()
+    headers = dict(IMAGE_HEADERS, Range=f'bytes=0-{max_bytes - 1}')
+    probe = ImageProbe(max_bytes=max_bytes)
 
-        # If no OG image, try favicon
-        if not og_data['image']:
-            favicon_selectors = [
-                'link[rel="icon"]',
-                'link[rel="shortcut icon"]',
-                'link[rel="apple-touch-icon"]',
-                'link[rel="apple-touch-icon-precomposed"]'
-            ]
-
-            for selector in favicon_selectors:
-                favicon = soup.select_one(selector)
-                if favicon and favicon.get('href'):
-                    og_data['image'] = urljoin(url, favicon.get('href'))
-                    print(f"Using favicon: {og_data['image']}")
-                    break
+    response = session.get(image_url, headers=headers, timeout=10, stream=True)
+    try:
+        response.raise_for_status()
+        for chunk in response.iter_content(PROBE_CHUNK_SIZE):
+            probe.feed(chunk)
+            if probe.done:
+                break
+    finally:
+        response.close()
+
+    return _probe_result(image_url, probe)
+
+def image_dimensions(og_data, image=None, session=None, image_cache=None):
+    """Pixel size of og:image found as cheaply as possible, or None.
+
+    Declared og:image:width/height come first, then the header of an already
+    downloaded image, then a ranged probe of the image URL.
+    """
+    declared = declared_image_size(og_data)
+    if declared:
+        return declared
+
+    try:
+        if image is not None:
+            return image.size
+        return probe_image_size(og_data['image'], session=session, image_cache=image_cache)
+    except Exception as e:
+        print(f"Could not probe image {og_data['image']}: {e}")
+        return None
 
-        # Site name
-        og_site = soup.find('meta', property='og:site_name')
-        if og_site:
-            og_data['site_name'] = og_site.get('content', '')
+def _site_of(host):
+    """Approximate the registrable domain of a host.
+
+    That is the last two labels, or three under one of MULTI_LABEL_SUFFIXES
+    (www.bbc.co.uk -> bbc.co.uk); IP addresses stand for themselves. For a
+    suffix missing from that short list it errs towards one site: some
+    third-party scripts are let through, but no first-party one is blocked.
+    """
+    host = (host or '').lower().rstrip('.')
+    labels = host.split('.')
+    if ':' in host or labels[-1].isdigit():
+        return host
+    size = 3 if '.'.join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return '.'.join(labels[-size:])
+
+async def _route_meta_only(route, page_url):
+    """Playwright route handler that aborts requests not needed for metadata."""
+    request = route.request
+    resource_type = request.resource_type
+
+    blocked = resource_type in BLOCKED_RESOURCE_TYPES
+    if not blocked and resource_type == 'script':
+        # Judge third-party scripts against the frame's URL, which follows redirects
+        try:
+            frame_url = request.frame.url
+        except Exception:
+            frame_url = ''
+        if not frame_url.startswith('http'):
+            frame_url = page_url
+        blocked = _site_of(urlparse(request.url).hostname) != _site_of(urlparse(frame_url).hostname)
+
+    try:
+        if blocked:
+            await route.abort()
         else:
-            parsed_url = urlparse(url)
-            og_data['site_name'] = parsed_url.netloc
+            await route.continue_()
+    except Exception:
+        # The page may already be closed after an early exit
+        pass
+
+class BrowserPool:
+    """Keep one headless Chromium warm and hand out a fresh context per page.
+
+    Playwright runs on a private event loop in a background thread, so the pool
+    can be shared by batch worker threads (fetch_html) and by coroutines on
+    other loops (fetch_html_async). At most max_pages pages are open at once;
+    the browser is relaunched after recycle_after pages or if it crashes.
+
+    With block_resources, images, media, fonts, stylesheets and third-party
+    scripts are aborted. If wait_for_tags is set the HTML is returned as soon
+    as one of those meta tags is in the DOM, instead of after a fixed sleep.
+    """
+
+    def __init__(self, max_pages=DEFAULT_BROWSER_MAX_PAGES, recycle_after=DEFAULT_BROWSER_RECYCLE_AFTER,
+                 block_resources=True, wait_for_tags=DEFAULT_BROWSER_WAIT_TAGS,
+                 tag_timeout=DEFAULT_BROWSER_TAG_TIMEOUT):
+        self.max_pages = max(1, max_pages)
+        self.recycle_after = max(1, recycle_after)
+        self.block_resources = block_resources
+        self.wait_for_tags = tuple(wait_for_tags or ())
+        self.tag_timeout = tag_timeout
+
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # Only touched from the pool's own event loop
+        self._playwright = None
+        self._browser = None
+        self._pages_served = 0
+        self._active_pages = {}
+        self._semaphore = None
+        self._launch_lock = None
+
+    def _ensure_loop(self):
+        import asyncio
+
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name='linkpreview-browser', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _submit(self, coro):
+        import asyncio
+
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def fetch_html(self, url):
+        """Render url in a fresh page and return the final HTML (blocking)."""
+        return self._submit(self._render_html(url)).result()
+
+    async def fetch_html_async(self, url):
+        """Render url in a fresh page and return the final HTML (awaitable)."""
+        import asyncio
+
+        return await asyncio.wrap_future(self._submit(self._render_html(url)))
+
+    async def _acquire_browser(self):
+        async with self._launch_lock:
+            browser = self._browser
+
+            if browser is not None and not browser.is_connected():
+                print("Browser disconnected, relaunching Chromium...")
+                self._active_pages.pop(browser, None)
+                browser = None
+            elif browser is not None and self._pages_served >= self.recycle_after:
+                print(f"Recycling browser after {self._pages_served} pages")
+                browser = None
+                await self._close_if_idle(self._browser)
+
+            if browser is None:
+                if self._playwright is None:
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+                browser = await self._playwright.chromium.launch(headless=True)
+                self._browser = browser
+                self._pages_served = 0
+                self._active_pages[browser] = 0
+
+            self._pages_served += 1
+            self._active_pages[browser] += 1
+            return browser
+
+    async def _release_browser(self, browser):
+        if browser in self._active_pages:
+            self._active_pages[browser] -= 1
+        if browser is not self._browser:
+            # Retired by recycling - close once its last page is done
+            await self._close_if_idle(browser)
+
+    async def _close_if_idle(self, browser):
+        if self._active_pages.get(browser, 0) > 0:
+            return
+        self._active_pages.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception:
+            pass
 
-        # URL (clean domain)
-        parsed_url = urlparse(url)
-        og_data['url'] = parsed_url.netloc
+    async def _render_html(self, url):
+        import asyncio
+
+        if self._semaphore is None:
+            # Created here so they bind to the pool's loop
+            self._semaphore = asyncio.Semaphore(self.max_pages)
+            self._launch_lock = asyncio.Lock()
+
+        async with self._semaphore:
+            browser = await self._acquire_browser()
+            context = None
+            try:
+                context = await browser.new_context(user_agent=BROWSER_USER_AGENT)
+                if self.block_resources:
+                    await context.route('**/*', functools.partial(_route_meta_only, page_url=url))
+                page = await context.new_page()
+
+                # Navigate to page with shorter timeout for faster response
+                try:
+                    await page.goto(url, wait_until='domcontentloaded', timeout=15000)
+                except Exception:
+                    # If that fails, try with even shorter timeout
+                    print("DOM content loaded timeout, trying with load event...")
+                    await page.goto(url, wait_until='load', timeout=10000)
+
+                if self.wait_for_tags:
+                    # Stop as soon as the metadata we need is in the DOM
+                    selector = ', '.join(f'meta[property="{tag}"], meta[name="{tag}"]'
+                                         for tag in self.wait_for_tags)
+                    try:
+                        await page.wait_for_selector(selector, state='attached',
+                                                     timeout=self.tag_timeout)
+                    except Exception:
+                        print(f"No {', '.join(self.wait_for_tags)} after {self.tag_timeout} ms, using page as is")
+                else:
+                    # Wait for any late-loading content (reduced wait time)
+                    await page.wait_for_timeout(1000)
+
+                # Get the final HTML after JavaScript execution
+                return await page.content()
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release_browser(browser)
+
+    async def _shutdown(self):
+        for browser in list(self._active_pages):
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._active_pages.clear()
+        self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self):
+        """Close the browser and stop the background event loop."""
+        import asyncio
+
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(timeout=30)
+        except Exception as e:
+            print(f"Error shutting down browser pool: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+
+def configure_browser_pool(**options):
+    """Replace the process-wide browser pool with one built from BrowserPool options."""
+    global _default_browser_pool
+    with _default_browser_pool_lock:
+        if _default_browser_pool is not None:
+            _default_browser_pool.close()
+        _default_browser_pool = BrowserPool(**options)
+        return _default_browser_pool
+
+def get_browser_pool():
+    """Return the process-wide browser pool; Chromium launches on first use."""
+    global _default_browser_pool
+    with _default_browser_pool_lock:
+        if _default_browser_pool is None:
+            _default_browser_pool = BrowserPool()
+        return _default_browser_pool
+
+def _close_default_browser_pool():
+    if _default_browser_pool is not None:
+        _default_browser_pool.close()
+
+atexit.register(_close_default_browser_pool)
+
+def extract_og_data_with_playwright(url, browser_pool=None, parser=None):
+    """Extract Open Graph data using Playwright for JavaScript-rendered pages."""
+    if not PLAYWRIGHT_AVAILABLE:
+        print("Playwright not available. Install with: pip install playwright")
+        return None
+
+    try:
+        print("Attempting JavaScript-aware extraction with Playwright...")
 
-        # Store the full URL for JSON output
-        og_data['full_url'] = url
+        browser_pool = browser_pool or get_browser_pool()
+        html_content = browser_pool.fetch_html(url)
+
+        og_data = parse_og_html(html_content, url, parser=parser)
 
         print(f"Playwright extraction successful!")
         print(f"Title: {og_data['title']}")
@@ -144,157 +835,1050 @@ def extract_og_data_with_playwright(url):
         print(f"Playwright extraction failed: {e}")
         return None
 
-def extract_og_data(url):
-    """Extract Open Graph meta tags from a URL."""
+async def extract_og_data_with_playwright_async(url, executor=None, browser_pool=None, parser=None):
+    """Async counterpart of extract_og_data_with_playwright().
+
+    The page is rendered on the browser pool's loop without tying up a
+    thread; only parsing runs in executor.
+    """
+    import asyncio
+
+    if not PLAYWRIGHT_AVAILABLE:
+        print("Playwright not available. Install with: pip install playwright")
+        return None
+
     try:
-        # Enhanced headers to mimic real browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0',
-        }
+        print(f"Attempting JavaScript-aware extraction of {url} with Playwright...")
 
-        # Try with session for better handling
-        session = requests.Session()
-        session.headers.update(headers)
+        browser_pool = browser_pool or get_browser_pool()
+        html_content = await browser_pool.fetch_html_async(url)
 
-        # Follow redirects and get final URL with shorter timeout
-        response = session.get(url, timeout=10, allow_redirects=True)
-        response.raise_for_status()
+        og_data = await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(parse_og_html, html_content, url, parser=parser))
+
+        print(f"Playwright extraction of {url} successful: {og_data['title']}")
+        return og_data
 
-        print(f"Final URL after redirects: {response.url}")
-        print(f"Response status: {response.status_code}")
-        print(f"Content length: {len(response.text)}")
+    except Exception as e:
+        print(f"Playwright extraction of {url} failed: {e}")
+        return None
+
+def collect_head_tags(soup):
+    """Collect every meta/link/title tag of interest in a single walk of the document.
+
+    Returns a lookup table {'property': {}, 'name': {}, 'link': {}, 'title': str}
+    where the first occurrence of each key wins, like soup.find() would.
+    Meta values are None when the tag has no content attribute.
+
+    The whole tree is walked rather than soup.head, because lxml moves tags
+    that follow stray markup in the head into the body; after the streamed
+    fetch the document is just the head anyway.
+    """
+    tags = {'property': {}, 'name': {}, 'link': {}, 'title': None}
+
+    for element in soup.find_all(['meta', 'link', 'title']):
+        if element.name == 'meta':
+            for attr in ('property', 'name'):
+                key = element.get(attr)
+                if key:
+                    tags[attr].setdefault(key, element.get('content'))
+        elif element.name == 'link':
+            rel = element.get('rel')
+            href = element.get('href')
+            if rel and href:
+                if isinstance(rel, list):
+                    rel = ' '.join(rel)
+                tags['link'].setdefault(rel.lower(), href)
+        elif tags['title'] is None:
+            tags['title'] = element.text.strip()
+
+    return tags
+
+def _dimension(value):
+    """Parse a declared pixel dimension such as og:image:width, or None."""
+    try:
+        value = int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
 
-        soup = BeautifulSoup(response.text, 'html.parser')
+def og_data_from_tags(tags, url):
+    """Build og_data from a collect_head_tags() table, applying the fallback rules."""
+    properties = tags['property']
+    names = tags['name']
+    parsed_url = urlparse(url)
 
-        # Extract OG data with fallbacks
-        og_data = {}
+    og_data = {}
 
-        # Title
-        og_title = soup.find('meta', property='og:title')
-        if og_title:
-            og_data['title'] = og_title.get('content', '')
-        else:
-            title_tag = soup.find('title')
-            og_data['title'] = title_tag.text.strip() if title_tag else 'No Title'
+    # Title
+    if 'og:title' in properties:
+        og_data['title'] = properties['og:title'] or ''
+    else:
+        og_data['title'] = tags['title'] if tags['title'] is not None else 'No Title'
 
-        # Description
-        og_desc = soup.find('meta', property='og:description')
-        if og_desc:
-            og_data['description'] = og_desc.get('content', '')
+    # Description
+    if 'og:description' in properties:
+        og_data['description'] = properties['og:description'] or ''
+    elif 'description' in names:
+        og_data['description'] = names['description'] if names['description'] is not None else 'No description available'
+    else:
+        og_data['description'] = 'No description available'
+
+    # Image - try Open Graph image first, with its declared size if any
+    og_data['image'] = None
+    og_data['image_width'] = None
+    og_data['image_height'] = None
+    if properties.get('og:image'):
+        og_data['image'] = urljoin(url, properties['og:image'])
+        og_data['image_width'] = _dimension(properties.get('og:image:width'))
+        og_data['image_height'] = _dimension(properties.get('og:image:height'))
+
+    # If no OG image, try favicon
+    if not og_data['image']:
+        for rel in FAVICON_RELS:
+            if rel in tags['link']:
+                og_data['image'] = urljoin(url, tags['link'][rel])
+                print(f"Using favicon: {og_data['image']}")
+                break
+
+    # Site name, falling back to domain name
+    if 'og:site_name' in properties:
+        og_data['site_name'] = properties['og:site_name'] or ''
+    else:
+        og_data['site_name'] = parsed_url.netloc
+
+    # URL (clean domain)
+    og_data['url'] = parsed_url.netloc
+
+    # Store full URL for JSON output
+    og_data['full_url'] = url
+
+    # Extract additional OG metadata for JSON export
+    og_data['og_type'] = (properties['og:type'] or '') if 'og:type' in properties else None
+    og_data['og_locale'] = (properties['og:locale'] or '') if 'og:locale' in properties else None
+
+    return og_data
+
+_TAG_SCAN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<script\b.*?</script\s*>'
+    r'|<title\b[^>]*>(?P<title>.*?)</title\s*>'
+    r'|<(?P<tag>meta|link)\b(?P<attrs>(?:"[^"]*"|\'[^\']*\'|[^\'">])*)>',
+    re.I | re.S)
+_ATTR_SCAN_RE = re.compile(r'([^\s"\'>/=]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?')
+
+def scan_head_tags(html):
+    """Regex tokenizer that builds the collect_head_tags() table without a parse tree.
+
+    Comments and scripts are skipped so markup inside them is not picked up,
+    and a '>' inside a quoted attribute value does not end the tag.
+    """
+    tags = {'property': {}, 'name': {}, 'link': {}, 'title': None}
+
+    for match in _TAG_SCAN_RE.finditer(html):
+        if match.group('title') is not None:
+            if tags['title'] is None:
+                tags['title'] = html_lib.unescape(match.group('title')).strip()
+            continue
+        if not match.group('tag'):
+            continue
+
+        attrs = {}
+        for name, dq, sq, bare in _ATTR_SCAN_RE.findall(match.group('attrs')):
+            attrs.setdefault(name.lower(), html_lib.unescape(dq or sq or bare))
+
+        if match.group('tag').lower() == 'meta':
+            for attr in ('property', 'name'):
+                key = attrs.get(attr)
+                if key:
+                    tags[attr].setdefault(key, attrs.get('content'))
         else:
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            og_data['description'] = meta_desc.get('content', 'No description available') if meta_desc else 'No description available'
+            rel = ' '.join(attrs.get('rel', '').split())
+            href = attrs.get('href')
+            if rel and href:
+                tags['link'].setdefault(rel.lower(), href)
 
-        # Image - try multiple sources
-        og_data['image'] = None
+    return tags
 
-        # First try Open Graph image
-        og_image = soup.find('meta', property='og:image')
-        if og_image:
-            image_url = og_image.get('content', '')
-            og_data['image'] = urljoin(url, image_url)
+def parse_head_tags(html, parser=None):
+    """Build the head tag table with the chosen parser backend.
 
-        # If no OG image, try favicon
-        if not og_data['image']:
-            # Try different favicon selectors
-            favicon_selectors = [
-                'link[rel="icon"]',
-                'link[rel="shortcut icon"]',
-                'link[rel="apple-touch-icon"]',
-                'link[rel="apple-touch-icon-precomposed"]'
-            ]
-
-            for selector in favicon_selectors:
-                favicon = soup.select_one(selector)
-                if favicon and favicon.get('href'):
-                    og_data['image'] = urljoin(url, favicon.get('href'))
-                    print(f"Using favicon: {og_data['image']}")
-                    break
+    Falls back to html.parser when a BeautifulSoup backend (e.g. lxml) is
+    not installed.
+    """
+    parser = parser or DEFAULT_PARSER
+    if parser not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser '{parser}', choose from: {', '.join(PARSER_BACKENDS)}")
+
+    if parser == 'scan':
+        return scan_head_tags(html)
 
-            # If still no image, try default favicon location
-            if not og_data['image']:
-                parsed_url = urlparse(url)
-                default_favicon = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
-                # Test if default favicon exists
+    from bs4 import BeautifulSoup, FeatureNotFound
+
+    if parser not in _missing_parsers:
+        try:
+            return collect_head_tags(BeautifulSoup(html, parser))
+        except FeatureNotFound:
+            _missing_parsers.add(parser)
+            print(f"Parser '{parser}' not available, falling back to html.parser")
+
+    return collect_head_tags(BeautifulSoup(html, 'html.parser'))
+
+def parse_og_html(html, url, parser=None):
+    """Parse Open Graph data with fallbacks out of an HTML document."""
+    start = time.perf_counter()
+    tags = parse_head_tags(html, parser=parser)
+    print(f"Parsed {len(html)} chars with {parser or DEFAULT_PARSER} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return og_data_from_tags(tags, url)
+
+def default_favicon_url(url):
+    """Return the conventional /favicon.ico location for a page URL."""
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+
+class _HeadEndDetector(HTMLParser):
+    """Incremental tokenizer that notices when the document head is over."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.head_closed = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.head_closed = True
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_closed = True
+
+class HeadCollector:
+    """Accumulate a streamed HTML body until </head> or max_bytes is reached.
+
+    Chunks are fed to an incremental parser as they arrive, so scripts in the
+    head containing "</head>" don't end collection early.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_HEAD_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._chunks = []
+        self._detector = _HeadEndDetector()
+
+    @property
+    def head_complete(self):
+        return self._detector.head_closed
+
+    @property
+    def done(self):
+        return self._detector.head_closed or self.size >= self.max_bytes
+
+    def feed(self, chunk):
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        # Latin-1 never fails and keeps the ASCII markup intact for tag detection
+        try:
+            self._detector.feed(chunk.decode('latin-1'))
+        except Exception:
+            pass
+
+    @property
+    def data(self):
+        return b''.join(self._chunks)
+
+    def text(self, content_type=''):
+        """Decode the collected bytes using the header or <meta> charset."""
+        return decode_html(self.data, content_type)
+
+def decode_html(data, content_type=''):
+    """Decode HTML bytes using the Content-Type or <meta> charset, else UTF-8."""
+    encoding = 'utf-8'
+    match = (re.search(r'charset=["\']?([\w.:-]+)', content_type or '', re.I) or
+             re.search(r'<meta[^>]+charset=["\']?([\w.:-]+)', data[:4096].decode('latin-1'), re.I))
+    if match:
+        try:
+            encoding = codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+
+    return data.decode(encoding, errors='replace')
+
+def _parse_cache_control(value):
+    """Parse a Cache-Control header into a {directive: value or True} dict."""
+    directives = {}
+    for part in (value or '').split(','):
+        name, _, arg = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else True
+    return directives
+
+class HttpCache:
+    """On-disk cache of page heads with ETag / Last-Modified revalidation.
+
+    Entries are keyed by the final URL after redirects and hold the response
+    validators, the freshness lifetime from Cache-Control / Expires and the
+    head bytes that were read. Requested URLs that redirect are mapped to
+    their final URL through small alias records, which are rewritten or
+    dropped when a later fetch of the requested URL ends somewhere else.
+
+    Once the files exceed max_bytes, the least recently used entries are
+    removed; a cache hit counts as a use. Safe to share between threads.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_HTTP_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = None   # Bytes on disk, counted on the first store
+
+    def _path(self, url, suffix):
+        digest = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}{suffix}")
+
+    def _entries(self):
+        """{digest: [last use, bytes, paths]} for every file in the cache."""
+        entries = {}
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
                 try:
-                    response = session.head(default_favicon, timeout=5)
-                    if response.status_code == 200:
-                        og_data['image'] = default_favicon
-                        print(f"Using default favicon: {og_data['image']}")
-                except:
-                    pass
-
-        # Site name
-        og_site = soup.find('meta', property='og:site_name')
-        if og_site:
-            og_data['site_name'] = og_site.get('content', '')
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = entries.setdefault(filename.split('.', 1)[0], [0, 0, []])
+                entry[0] = max(entry[0], stat.st_mtime)
+                entry[1] += stat.st_size
+                entry[2].append(path)
+        return entries
+
+    def _account(self, size):
+        """Count newly written bytes and prune least recently used entries if over budget."""
+        with self._lock:
+            if self._total is None:
+                entries = self._entries()
+                self._total = sum(entry[1] for entry in entries.values())
+            else:
+                self._total += size
+                if self._total <= self.max_bytes:
+                    return
+                entries = self._entries()
+                self._total = sum(entry[1] for entry in entries.values())
+
+            if self._total <= self.max_bytes:
+                return
+            for _, size, paths in sorted(entries.values()):
+                if self._total <= self.max_bytes * HTTP_CACHE_PRUNE_TO:
+                    break
+                for path in paths:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._total -= size
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _write(self, path, data):
+        # Write to a temp file and rename so concurrent readers never see partial files
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def lookup(self, url):
+        """Return the cached entry for a requested URL, or None."""
+        try:
+            with open(self._path(url, '.alias'), 'r', encoding='utf-8') as f:
+                final_url = f.read().strip()
+        except OSError:
+            final_url = url
+
+        try:
+            with open(self._path(final_url, '.json'), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(self._path(final_url, '.body'), 'rb') as f:
+                entry['body'] = f.read()
+        except (OSError, ValueError):
+            return None
+
+        # Mark as recently used for pruning
+        self._touch(self._path(final_url, '.json'))
+        if final_url != url:
+            self._touch(self._path(url, '.alias'))
+        return entry
+
+    def is_fresh(self, entry):
+        return entry['expires'] > time.time()
+
+    def conditional_headers(self, entry):
+        """Request headers that let the origin answer 304 Not Modified."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _expires(self, headers):
+        """Absolute expiry time from Cache-Control max-age or Expires (0 = always revalidate)."""
+        cache_control = _parse_cache_control(headers.get('cache-control'))
+        if 'no-cache' in cache_control:
+            return 0
+
+        max_age = cache_control.get('max-age')
+        if max_age is not None:
+            try:
+                age = int(headers.get('age') or 0)
+                return time.time() + int(max_age) - age
+            except ValueError:
+                return 0
+
+        if headers.get('expires'):
+            try:
+                return parsedate_to_datetime(headers['expires']).timestamp()
+            except (TypeError, ValueError):
+                return 0
+        return 0
+
+    def store(self, url, final_url, headers, body):
+        """Store a 200 response's head bytes unless Cache-Control forbids it."""
+        if 'no-store' in _parse_cache_control(headers.get('cache-control')):
+            return
+
+        entry = {
+            'url': final_url,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_type': headers.get('content-type', ''),
+            'expires': self._expires(headers),
+        }
+        if not entry['etag'] and not entry['last_modified'] and entry['expires'] <= time.time():
+            # Neither revalidatable nor fresh - nothing to gain from keeping it
+            return
+
+        if len(body) > self.max_bytes:
+            return
+
+        metadata = json.dumps(entry).encode('utf-8')
+        self._write(self._path(final_url, '.body'), body)
+        self._write(self._path(final_url, '.json'), metadata)
+        size = len(body) + len(metadata)
+        if final_url != url:
+            self._write(self._path(url, '.alias'), final_url.encode('utf-8'))
+            size += len(final_url)
         else:
-            # Fallback to domain name
-            parsed_url = urlparse(url)
-            og_data['site_name'] = parsed_url.netloc
+            try:
+                os.remove(self._path(url, '.alias'))
+            except OSError:
+                pass
+        self._account(size)
+
+    def forget(self, url):
+        """Drop a requested URL's alias and its own entry, e.g. once it redirects elsewhere or is gone."""
+        for suffix in ('.alias', '.json', '.body'):
+            try:
+                os.remove(self._path(url, suffix))
+            except OSError:
+                pass
+
+    def purge(self):
+        """Remove every cached response."""
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.makedirs(self.directory, exist_ok=True)
+            self._total = 0
+
+    def refresh(self, entry, headers):
+        """Update an entry's validators and lifetime after a 304 response."""
+        entry = dict(entry, expires=self._expires(headers))
+        if headers.get('etag'):
+            entry['etag'] = headers['etag']
+        if headers.get('last-modified'):
+            entry['last_modified'] = headers['last-modified']
+        body = entry.pop('body')
+        self._write(self._path(entry['url'], '.json'), json.dumps(entry).encode('utf-8'))
+        entry['body'] = body
+        return entry
+
+def normalize_url(url):
+    """Normalize a URL for use as a cache key.
+
+    Lowercases scheme and host, drops default ports, credentials and the
+    fragment, and sorts query parameters.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != {'http': 80, 'https': 443}.get(scheme):
+        netloc += f":{parsed.port}"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, parsed.path or '/', parsed.params, query, ''))
+
+class MetadataCache:
+    """SQLite store of extracted og_data dicts keyed by normalized URL.
+
+    Successful extractions live for ttl seconds; failures are cached as
+    negative entries for negative_ttl seconds so dead URLs aren't retried.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_METADATA_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS metadata ('
+                ' url TEXT PRIMARY KEY, og_data TEXT, expires REAL NOT NULL)')
+            self._conn.commit()
+
+    def get(self, url):
+        """Return (found, og_data); og_data is None for a cached failure."""
+        with self._lock:
+            row = self._conn.execute('SELECT og_data, expires FROM metadata WHERE url = ?',
+                                     (normalize_url(url),)).fetchone()
+        if row is None or row[1] <= time.time():
+            return False, None
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def put(self, url, og_data):
+        """Cache og_data for url, or a negative entry if og_data is None."""
+        ttl = self.ttl if og_data else self.negative_ttl
+        if ttl <= 0:
+            return
+        value = json.dumps(og_data, ensure_ascii=False) if og_data else None
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO metadata (url, og_data, expires) VALUES (?, ?, ?)',
+                               (normalize_url(url), value, time.time() + ttl))
+            self._conn.commit()
+
+    def purge(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute('DELETE FROM metadata')
+            self._conn.commit()
+            self._conn.execute('VACUUM')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ImageCache:
+    """Content-addressed on-disk image cache with a byte budget and LRU eviction.
+
+    Image URLs map to the SHA-256 of their bytes, so a banner served under
+    several URLs is stored once. With store_variants, images already resized
+    for a target box are kept as well (as quickly compressed PNGs), share
+    the same budget and are evicted with their original. Safe to share
+    between threads.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_IMAGE_CACHE_SIZE, store_variants=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_variants = store_variants
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), timeout=30,
+                                     check_same_thread=False)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS blobs ('
+                ' name TEXT PRIMARY KEY, hash TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS blobs_lru ON blobs (last_access)')
+            self._conn.commit()
+
+    def _blob_path(self, name):
+        return os.path.join(self.directory, name[:2], name)
+
+    def _hash_for(self, url):
+        row = self._conn.execute('SELECT hash FROM urls WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def _read_blob(self, name):
+        """Read a blob and mark it as recently used; caller holds the lock."""
+        try:
+            with open(self._blob_path(name), 'rb') as f:
+                data = f.read()
+        except OSError:
+            self._conn.execute('DELETE FROM blobs WHERE name = ?', (name,))
+            self._conn.commit()
+            return None
+        self._conn.execute('UPDATE blobs SET last_access = ? WHERE name = ?', (time.time(), name))
+        self._conn.commit()
+        return data
+
+    def _write_blob(self, name, digest, data):
+        """Store a blob and evict old ones if over budget; caller holds the lock."""
+        path = self._blob_path(name)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._conn.execute('INSERT OR REPLACE INTO blobs (name, hash, size, last_access) VALUES (?, ?, ?, ?)',
+                           (name, digest, len(data), time.time()))
+        self._evict()
+        self._conn.commit()
+
+    def _remove_blob(self, name):
+        try:
+            os.remove(self._blob_path(name))
+        except OSError:
+            pass
+        self._conn.execute('DELETE FROM blobs WHERE name = ?', (name,))
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        removed = set()
+        for name, digest, size in self._conn.execute(
+                'SELECT name, hash, size FROM blobs ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            if name in removed:
+                continue
+            self._remove_blob(name)
+            total -= size
+            if name == digest:
+                # Original bytes gone - forget the URLs pointing at them and its variants
+                self._conn.execute('DELETE FROM urls WHERE hash = ?', (digest,))
+                for variant, variant_size in self._conn.execute(
+                        'SELECT name, size FROM blobs WHERE hash = ?', (digest,)).fetchall():
+                    self._remove_blob(variant)
+                    removed.add(variant)
+                    total -= variant_size
+
+    def get(self, url):
+        """Return the cached bytes for an image URL, or None."""
+        with self._lock:
+            digest = self._hash_for(url)
+            return self._read_blob(digest) if digest else None
+
+    def put(self, url, data):
+        """Cache downloaded image bytes under their content hash."""
+        if not data or len(data) > self.max_bytes:
+            return
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)', (url, digest))
+            self._write_blob(digest, digest, data)
+
+    def get_variant(self, url, variant):
+        """Return a cached resized variant (a PIL image) of an image URL, or None."""
+        from PIL import Image
+
+        if not self.store_variants:
+            return None
+        with self._lock:
+            digest = self._hash_for(url)
+            data = self._read_blob(f"{digest}-{variant}") if digest else None
+        return Image.open(io.BytesIO(data)) if data else None
+
+    def put_variant(self, url, variant, image):
+        """Cache a resized variant of an image whose original bytes are cached."""
+        if not self.store_variants:
+            return
+        with self._lock:
+            digest = self._hash_for(url)
+        if not digest:
+            return
+
+        buffer = io.BytesIO()
+        try:
+            # Fast compression: a slow encode would cost more than the resize it saves
+            image.save(buffer, 'PNG', compress_level=1)
+        except (OSError, ValueError):
+            # Modes PNG can't hold (e.g. CMYK) are simply not cached
+            return
+        with self._lock:
+            self._write_blob(f"{digest}-{variant}", digest, buffer.getvalue())
+
+    def purge(self):
+        """Remove every cached image and variant."""
+        with self._lock:
+            self._conn.execute('DELETE FROM urls')
+            self._conn.execute('DELETE FROM blobs')
+            self._conn.commit()
+            for entry in os.listdir(self.directory):
+                path = os.path.join(self.directory, entry)
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def cached_variant(image_cache, image_url, variant, build):
+    """Return a resized image from image_cache, or build() it and cache the result."""
+    if image_cache:
+        image = image_cache.get_variant(image_url, variant)
+        if image is not None:
+            return image
+
+    image = build()
+    if image_cache:
+        image_cache.put_variant(image_url, variant, image)
+    return image
+
+def _cached_head(http_cache, url):
+    """Look a page up before fetching its head; returns (entry, html, request headers).
+
+    html is set for a fresh entry, which needs no request. Otherwise url is
+    requested with the stale entry's validators, if any - url itself and not
+    the cached final URL, since its redirect may now lead somewhere else.
+    """
+    entry = http_cache.lookup(url) if http_cache else None
+    if entry and http_cache.is_fresh(entry):
+        print(f"HTTP cache hit: {entry['url']}")
+        return entry, decode_html(entry['body'], entry['content_type']), {}
+    return entry, None, http_cache.conditional_headers(entry) if entry else {}
+
+def _revalidated_head(http_cache, url, entry, final_url, status, headers):
+    """Settle a stale entry once the response status is in; returns (html, refetch).
+
+    The validators only count when the redirects still end at the entry's
+    URL; then a 304 gives back the cached html. If they end elsewhere the
+    alias is dropped, and a 304 there (validators meant for another URL)
+    sets refetch: final_url must be fetched again without them. A 404/410
+    drops the alias too.
+    """
+    if not entry:
+        return None, False
+
+    if final_url == entry['url']:
+        if status == 304:
+            print(f"HTTP cache revalidated (304): {entry['url']}")
+            entry = http_cache.refresh(entry, headers)
+            return decode_html(entry['body'], entry['content_type']), False
+    else:
+        print(f"HTTP cache: {url} now redirects to {final_url}")
+        http_cache.forget(url)
+
+    if status in PERMANENT_HTTP_STATUSES:
+        http_cache.forget(url)
+    return None, status == 304
+
+def _stored_head(http_cache, url, final_url, headers, collector):
+    """Log how far a page was read, cache its head and return it decoded."""
+    stop_reason = '</head>' if collector.head_complete else ('byte cap' if collector.done else 'end of body')
+    print(f"Read {collector.size} bytes of HTML (stopped at {stop_reason})")
+
+    if http_cache:
+        http_cache.store(url, final_url, headers, collector.data)
+    return collector.text(headers.get('content-type', ''))
+
+def fetch_head_html(url, session=None, max_bytes=DEFAULT_MAX_HEAD_BYTES, http_cache=None):
+    """Stream a page and return (html, final_url, status) with only the head read.
+
+    The connection is closed as soon as </head> (or max_bytes) is reached.
+    With an HttpCache, fresh entries are served without a request and stale
+    ones are revalidated with a conditional request.
+    """
+    session = session or get_http_session()
+
+    entry, html, headers = _cached_head(http_cache, url)
+    if html is not None:
+        return html, entry['url'], 200
+
+    request_url = url
+    while True:
+        response = session.get(request_url, headers=headers, timeout=10, allow_redirects=True, stream=True)
+        try:
+            html, refetch = _revalidated_head(http_cache, url, entry, response.url, response.status_code,
+                                              response.headers)
+            if html is not None:
+                return html, response.url, 304
+
+            if not refetch:
+                response.raise_for_status()
+
+                collector = HeadCollector(max_bytes=max_bytes)
+                for chunk in response.iter_content(HEAD_CHUNK_SIZE):
+                    collector.feed(chunk)
+                    if collector.done:
+                        break
+                html = _stored_head(http_cache, url, response.url, response.headers, collector)
+                return html, response.url, response.status_code
+        finally:
+            response.close()
+
+        # The new redirect target answered validators meant for the old one
+        request_url, headers, entry = response.url, {}, None
+
+def extract_og_data(url, session=None, parser=None, http_cache=None, metadata_cache=None):
+    """Extract Open Graph meta tags from a URL.
+
+    Pass a session from create_http_session() to reuse pooled connections;
+    the shared default session is used otherwise. parser picks the HTML
+    parser backend (see PARSER_BACKENDS), http_cache is an optional
+    HttpCache for conditional page fetches and metadata_cache an optional
+    MetadataCache whose hits skip the network and parsing entirely. Failures
+    are only cached when is_permanent_failure() says a retry is pointless.
+    """
+    if metadata_cache:
+        found, og_data = metadata_cache.get(url)
+        if found:
+            print(f"Metadata cache hit: {url}" + ("" if og_data else " (cached failure)"))
+            return og_data
 
-        # URL (clean domain)
-        parsed_url = urlparse(url)
-        og_data['url'] = parsed_url.netloc
+    og_data, error = _extract_og_data(url, session=session, parser=parser, http_cache=http_cache)
+    if metadata_cache and (og_data or is_permanent_failure(error)):
+        metadata_cache.put(url, og_data)
+    return og_data
+
+def is_permanent_failure(error):
+    """Whether a failed page fetch would fail the same way if retried.
+
+    Only 404/410 responses and host names that don't exist count; timeouts,
+    connection resets, 5xx and temporary DNS errors may pass.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None) or getattr(error, 'status', None)
+        if status in PERMANENT_HTTP_STATUSES:
+            return True
+        if isinstance(error, socket.gaierror) and error.errno in PERMANENT_DNS_ERRORS:
+            return True
+        error = error.__cause__ or error.__context__ or getattr(error, 'reason', None)
+    return False
+
+def _parse_head(html, url, final_url, status, parser=None):
+    """Parse a fetched head into og_data, logging where the fetch ended."""
+    print(f"Final URL after redirects: {final_url}")
+    print(f"Response status: {status}")
+    return parse_og_html(html, url, parser=parser)
+
+def _use_default_favicon(og_data, favicon_url, status):
+    """Take the default favicon as og:image if probing it answered 200."""
+    if status == 200:
+        og_data['image'] = favicon_url
+        print(f"Using default favicon: {og_data['image']}")
+
+def _wants_rendering(og_data, url):
+    """Whether to retry a page without a meaningful title in Playwright (JavaScript rendering)."""
+    if (og_data.get('title') and og_data['title'] != 'No Title' and
+        len(og_data.get('title', '')) >= 3):
+        return False
+
+    print(f"Warning: No meaningful title extracted from {url}.")
+    print("This might be a JavaScript-rendered page.")
+    if not PLAYWRIGHT_AVAILABLE:
+        print("Playwright not available for JavaScript-rendered page fallback.")
+        return False
+    print("Attempting Playwright extraction...")
+    return True
+
+def _rendered_og_data(playwright_data):
+    """Playwright's og_data if it found a meaningful title, else None to keep the fetched data."""
+    if playwright_data and playwright_data.get('title') and len(playwright_data.get('title', '')) > 3:
+        return playwright_data
+    print("Playwright extraction also failed, using basic data")
+    return None
 
-        # Store full URL for JSON output
-        og_data['full_url'] = url
+def _falls_back_on_error(url, error):
+    """Log a failed fetch; returns whether to fall back to Playwright."""
+    print(f"Error extracting OG data from {url}: {error}")
+    print("The website may be blocking automated requests or requires JavaScript.")
+    if not PLAYWRIGHT_AVAILABLE:
+        print("Playwright not available for fallback extraction.")
+        return False
+    print("Attempting Playwright extraction as fallback...")
+    return True
 
-        # Extract additional OG metadata for JSON export
-        og_data['og_type'] = None
-        og_type = soup.find('meta', property='og:type')
-        if og_type:
-            og_data['og_type'] = og_type.get('content', '')
+def _extract_og_data(url, session=None, parser=None, http_cache=None):
+    """extract_og_data() without the metadata cache; returns (og_data, fetch error or None)."""
+    try:
+        session = session or get_http_session()
 
-        og_data['og_locale'] = None
-        og_locale = soup.find('meta', property='og:locale')
-        if og_locale:
-            og_data['og_locale'] = og_locale.get('content', '')
+        # Follow redirects and read only as far as the end of <head>
+        html, final_url, status = fetch_head_html(url, session=session, http_cache=http_cache)
+        og_data = _parse_head(html, url, final_url, status, parser=parser)
+
+        # If still no image, try default favicon location
+        if not og_data['image']:
+            default_favicon = default_favicon_url(url)
+            # Test if default favicon exists
+            try:
+                response = session.head(default_favicon, timeout=5)
+                _use_default_favicon(og_data, default_favicon, response.status_code)
+            except:
+                pass
 
         # Check if we got meaningful data (more lenient check)
-        if (not og_data.get('title') or og_data['title'] == 'No Title' or
-            len(og_data.get('title', '')) < 3):
-            print("Warning: No meaningful title extracted.")
-            print("This might be a JavaScript-rendered page.")
-
-            # Try Playwright as fallback for JavaScript rendering
-            if PLAYWRIGHT_AVAILABLE:
-                print("Attempting Playwright extraction...")
-                playwright_data = extract_og_data_with_playwright(url)
-                if playwright_data and playwright_data.get('title') and len(playwright_data.get('title', '')) > 3:
-                    return playwright_data
-                else:
-                    print("Playwright extraction also failed, using basic data")
-            else:
-                print("Playwright not available for JavaScript-rendered page fallback.")
+        if _wants_rendering(og_data, url):
+            playwright_data = _rendered_og_data(extract_og_data_with_playwright(url, parser=parser))
+            if playwright_data:
+                return playwright_data, None
+
+        return og_data, None
 
-        # If we have at least a title, return what we have
-        if og_data.get('title') and len(og_data.get('title', '')) > 3:
+    except Exception as e:
+        if _falls_back_on_error(url, e):
+            return extract_og_data_with_playwright(url, parser=parser), e
+        return None, e
+
+def create_async_http_session(pool_size=DEFAULT_POOL_SIZE, pool_hosts=DEFAULT_POOL_HOSTS):
+    """Create an aiohttp session for the asyncio fetch engine.
+
+    Must be called from inside a running event loop.
+    """
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=pool_size * pool_hosts, limit_per_host=pool_size,
+                                     ttl_dns_cache=300)
+    return aiohttp.ClientSession(headers=BROWSER_HEADERS, connector=connector,
+                                 timeout=aiohttp.ClientTimeout(total=10))
+
+async def extract_og_data_async(url, session, executor=None, parser=None, http_cache=None,
+                                metadata_cache=None):
+    """Async counterpart of extract_og_data() using an aiohttp session.
+
+    HTML parsing and the cache lookups and writes run in executor so the
+    event loop keeps servicing other requests; the Playwright fallback is
+    awaited on the shared BrowserPool.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    if metadata_cache:
+        found, og_data = await loop.run_in_executor(executor, metadata_cache.get, url)
+        if found:
+            print(f"Metadata cache hit: {url}" + ("" if og_data else " (cached failure)"))
             return og_data
 
-        return og_data
+    og_data, error = await _extract_og_data_async(url, session, executor=executor, parser=parser,
+                                                  http_cache=http_cache)
+    if metadata_cache and (og_data or is_permanent_failure(error)):
+        await loop.run_in_executor(executor, metadata_cache.put, url, og_data)
+    return og_data
+
+async def fetch_head_html_async(url, session, executor=None, max_bytes=DEFAULT_MAX_HEAD_BYTES,
+                                http_cache=None):
+    """Async counterpart of fetch_head_html() using an aiohttp session.
+
+    The HttpCache is consulted through the same helpers, run in executor.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    entry, html, headers = await loop.run_in_executor(executor, _cached_head, http_cache, url)
+    if html is not None:
+        return html, entry['url'], 200
+
+    request_url = url
+    while True:
+        # Leaving the block closes the connection
+        async with session.get(request_url, headers=headers, allow_redirects=True) as response:
+            final_url = str(response.url)
+            html, refetch = await loop.run_in_executor(executor, _revalidated_head, http_cache, url, entry,
+                                                       final_url, response.status, response.headers)
+            if html is not None:
+                return html, final_url, 304
+
+            if not refetch:
+                response.raise_for_status()
+
+                collector = HeadCollector(max_bytes=max_bytes)
+                async for chunk in response.content.iter_chunked(HEAD_CHUNK_SIZE):
+                    collector.feed(chunk)
+                    if collector.done:
+                        break
+                html = await loop.run_in_executor(executor, _stored_head, http_cache, url, final_url,
+                                                  response.headers, collector)
+                return html, final_url, response.status
+
+        # The new redirect target answered validators meant for the old one
+        request_url, headers, entry = final_url, {}, None
+
+async def _extract_og_data_async(url, session, executor=None, parser=None, http_cache=None):
+    """extract_og_data_async() without the metadata cache; returns (og_data, fetch error or None)."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    try:
+        # Follow redirects and read only as far as the end of <head>
+        html, final_url, status = await fetch_head_html_async(url, session, executor=executor,
+                                                              http_cache=http_cache)
+        og_data = await loop.run_in_executor(
+            executor, functools.partial(_parse_head, html, url, final_url, status, parser=parser))
+
+        # If still no image, try default favicon location
+        if not og_data['image']:
+            import aiohttp
+
+            default_favicon = default_favicon_url(url)
+            try:
+                async with session.head(default_favicon, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                    _use_default_favicon(og_data, default_favicon, response.status)
+            except Exception:
+                pass
+
+        if _wants_rendering(og_data, url):
+            playwright_data = _rendered_og_data(
+                await extract_og_data_with_playwright_async(url, executor=executor, parser=parser))
+            if playwright_data:
+                return playwright_data, None
+
+        return og_data, None
 
     except Exception as e:
-        print(f"Error extracting OG data: {e}")
-        print("The website may be blocking automated requests or requires JavaScript.")
+        if _falls_back_on_error(url, e):
+            return await extract_og_data_with_playwright_async(url, executor=executor, parser=parser), e
+        return None, e
 
-        # Try Playwright as fallback
-        if PLAYWRIGHT_AVAILABLE:
-            print("Attempting Playwright extraction as fallback...")
-            return extract_og_data_with_playwright(url)
-        else:
-            print("Playwright not available for fallback extraction.")
-            return None
+async def fetch_image_data_async(image_url, session):
+    """Download image bytes with an aiohttp session."""
+    async with session.get(image_url, headers=IMAGE_HEADERS) as response:
+        response.raise_for_status()
+        return await response.read()
+
+async def probe_image_size_async(image_url, session, image_cache=None, max_bytes=DEFAULT_PROBE_BYTES,
+                                 executor=None):
+    """Async counterpart of probe_image_size() for an aiohttp session.
+
+    The image cache is read in executor, off the event loop.
+    """
+    import asyncio
+
+    if image_cache:
+        cached_size = await asyncio.get_running_loop().run_in_executor(
+            executor, _cached_image_size, image_url, image_cache)
+        if cached_size:
+            return cached_size
+
+    headers = dict(IMAGE_HEADERS, Range=f'bytes=0-{max_bytes - 1}')
+    probe = ImageProbe(max_bytes=max_bytes)
+
+    async with session.get(image_url, headers=headers) as response:
+        response.raise_for_status()
+        async for chunk in response.content.iter_chunked(PROBE_CHUNK_SIZE):
+            probe.feed(chunk)
+            if probe.done:
+                break
+
+    return _probe_result(image_url, probe)
 
 def get_manual_og_data(url):
     """Get OG data manually from user input."""
@@ -325,8 +1909,12 @@ def get_manual_og_data(url):
         print("\nOperation cancelled.")
         return None
 
-def is_image_standalone_worthy(image_url, og_data):
-    """Determine if an image is high-quality enough to use standalone."""
+def is_image_standalone_worthy(image_url, og_data, image_size=None):
+    """Determine if an image is high-quality enough to use standalone.
+
+    With image_size (width, height), the real dimensions and aspect ratio are
+    scored instead of guessing the size from numbers in the URL.
+    """
     if not image_url:
         return False
 
@@ -351,16 +1939,24 @@ def is_image_standalone_worthy(image_url, og_data):
 
     # Additional checks
     is_og_image = 'og:image' in str(og_data)  # If it came from og:image tag
-    is_large_likely = any(size in url_lower for size in ['1200', '1024', '800', 'large', 'full'])
-    is_small_likely = any(size in url_lower for size in ['32', '64', '128', '150', 'small', 'thumb'])
+    if image_size:
+        img_width, img_height = image_size
+        is_large_likely = img_width >= 600 and img_height >= 300
+        is_small_likely = img_width < 300 or img_height < 150
+        is_card_shaped = 1.3 <= img_width / img_height <= 2.5  # Landscape, like a social card
+    else:
+        is_large_likely = any(size in url_lower for size in ['1200', '1024', '800', 'large', 'full'])
+        is_small_likely = any(size in url_lower for size in ['32', '64', '128', '150', 'small', 'thumb'])
+        is_card_shaped = False
 
-    # Score the image
+    # Score the image; measured sizes weigh more than guesses from the URL
     score = 0
     if has_quality_indicator: score += 2
     if is_og_image: score += 2
-    if is_large_likely: score += 1
+    if is_large_likely: score += 2 if image_size else 1
+    if is_card_shaped: score += 1
     if has_avoid_pattern: score -= 3
-    if is_small_likely: score -= 2
+    if is_small_likely: score -= 3 if image_size else 2
 
     # If it's a well-structured image URL (has meaningful filename), boost score
     filename = url_lower.split('/')[-1]
@@ -369,34 +1965,117 @@ def is_image_standalone_worthy(image_url, og_data):
 
     print(f"Image standalone analysis: {image_url}")
     print(f"Quality indicators: {has_quality_indicator}, Avoid patterns: {has_avoid_pattern}")
-    print(f"Size indicators - Large: {is_large_likely}, Small: {is_small_likely}")
+    if image_size:
+        print(f"Measured size {img_width}x{img_height} - Large: {is_large_likely}, "
+              f"Small: {is_small_likely}, Card-shaped: {is_card_shaped}")
+    else:
+        print(f"Size indicators - Large: {is_large_likely}, Small: {is_small_likely}")
     print(f"Final score: {score} (threshold: 3)")
 
     return score >= 3
 
-def get_font(size, bold=False):
-    """Get a font with cross-platform support."""
-    font_paths = [
-        # macOS fonts
-        "/System/Library/Fonts/Supplemental/Arial Bold.ttf" if bold else "/System/Library/Fonts/Supplemental/Arial.ttf",
-        "/System/Library/Fonts/ArialHB.ttc",
-        "/System/Library/Fonts/Helvetica.ttc",
-        # Linux fonts
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/usr/share/fonts/truetype/freefont/FreeSansBold.ttf" if bold else "/usr/share/fonts/truetype/freefont/FreeSans.ttf",
-        # Windows fonts
-        "C:/Windows/Fonts/arialbd.ttf" if bold else "C:/Windows/Fonts/arial.ttf",
-    ]
-
-    for path in font_paths:
-        if os.path.exists(path):
-            try:
-                return ImageFont.truetype(path, size)
-            except:
+class FontRegistry:
+    """Resolve font files once per process and cache loaded faces.
+
+    Each (family, weight) is resolved to a file the first time it's asked
+    for, the file is read into memory once, and faces are cached per
+    (family, size, weight) - a batch render loads each face exactly once.
+    Fonts in font_dir are tried before the system fonts for the default
+    family: files with "bold" in the name are the bold weight, and italic or
+    oblique files are ignored.
+    """
+
+    def __init__(self, font_dir=None):
+        self.font_dir = font_dir
+        self._families = {DEFAULT_FONT_FAMILY: SANS_FONT_PATHS}
+        self._paths = {}
+        self._data = {}
+        self._faces = {}
+        self._lock = threading.Lock()
+
+    def register(self, family, regular, bold=None):
+        """Add (or replace) a family from font files; bold defaults to regular."""
+        with self._lock:
+            self._families[family] = {False: (regular,), True: (bold or regular,)}
+            for key in [key for key in self._paths if key[0] == family]:
+                del self._paths[key]
+            for key in [key for key in self._faces if key[0] == family]:
+                del self._faces[key]
+
+    def _font_dir_paths(self, bold):
+        if not self.font_dir or not os.path.isdir(self.font_dir):
+            return []
+        paths = []
+        for name in sorted(os.listdir(self.font_dir)):
+            lower = name.lower()
+            if not lower.endswith(FONT_EXTENSIONS) or 'italic' in lower or 'oblique' in lower:
                 continue
+            if ('bold' in lower) == bold:
+                paths.append(os.path.join(self.font_dir, name))
+        return paths
+
+    def _candidates(self, family, bold):
+        paths = list(self._families.get(family, SANS_FONT_PATHS)[bold])
+        if family == DEFAULT_FONT_FAMILY:
+            paths = self._font_dir_paths(bold) + paths
+        return paths
+
+    def _load(self, path, size):
+        from PIL import ImageFont
+
+        if path not in self._data:
+            with open(path, 'rb') as f:
+                self._data[path] = f.read()
+        return ImageFont.truetype(io.BytesIO(self._data[path]), size)
+
+    def get(self, size, bold=False, family=DEFAULT_FONT_FAMILY):
+        """Return the face for (family, size, weight), loading it on first use."""
+        from PIL import ImageFont
+
+        key = (family, size, bold)
+        with self._lock:
+            face = self._faces.get(key)
+            if face is not None:
+                return face
+
+            path = self._paths.get((family, bold))
+            if path:
+                face = self._load(path, size)
+            else:
+                for candidate in self._candidates(family, bold):
+                    if not os.path.exists(candidate):
+                        continue
+                    try:
+                        face = self._load(candidate, size)
+                    except Exception:
+                        continue
+                    self._paths[(family, bold)] = candidate
+                    break
+
+            if face is None:
+                face = ImageFont.load_default()
+
+            self._faces[key] = face
+            return face
 
-    return ImageFont.load_default()
+def configure_fonts(font_dir=None):
+    """Replace the process-wide font registry, e.g. to add a font directory."""
+    global _default_font_registry
+    with _default_font_registry_lock:
+        _default_font_registry = FontRegistry(font_dir=font_dir)
+        return _default_font_registry
+
+def get_font_registry():
+    """Return the process-wide font registry."""
+    global _default_font_registry
+    with _default_font_registry_lock:
+        if _default_font_registry is None:
+            _default_font_registry = FontRegistry()
+        return _default_font_registry
+
+def get_font(size, bold=False, family=DEFAULT_FONT_FAMILY):
+    """Get a cached font face with cross-platform support."""
+    return get_font_registry().get(size, bold=bold, family=family)
 
 def draw_circuit_pattern(draw, x, y, width, height, accent_color):
     """Draw a circuit board pattern background."""
@@ -464,8 +2143,130 @@ def draw_circuit_pattern(draw, x, y, width, height, accent_color):
 
     return chip_x, chip_y, chip_width, chip_height
 
-def create_og_standard_preview(og_data, use_circuit=False, accent_color=None):
-    """Create a standard 1200x630 Open Graph image."""
+@functools.lru_cache(maxsize=CARD_CACHE_SIZE)
+def _circuit_tile(width, height, accent_color):
+    """Render the pattern once as an opaque tile plus whatever spills outside it.
+
+    On short areas lines and connectors reach past the rectangle, so the
+    pattern is drawn with a margin; the spill is kept as a small transparent
+    overlay, or None when there is none.
+    """
+    from PIL import Image, ImageDraw
+
+    margin = 100
+    layer = Image.new('RGBA', (width + 2 * margin + 1, height + 2 * margin + 1), (0, 0, 0, 0))
+    chip_x, chip_y, chip_width, chip_height = draw_circuit_pattern(
+        ImageDraw.Draw(layer), margin, margin, width, height, accent_color)
+    chip = (chip_x - margin, chip_y - margin, chip_width, chip_height)
+
+    # The rectangle is filled inclusively, hence the extra row and column
+    core_box = (margin, margin, margin + width + 1, margin + height + 1)
+    tile = layer.crop(core_box).convert('RGB')
+
+    layer.paste((0, 0, 0, 0), core_box)
+    spill = None
+    bbox = layer.getbbox()
+    if bbox:
+        spill = (layer.crop(bbox), (bbox[0] - margin, bbox[1] - margin))
+
+    return tile, spill, chip
+
+def paste_circuit_pattern(canvas, x, y, width, height, accent_color):
+    """Paste a circuit pattern rendered once per (width, height, accent_color).
+
+    Same pixels and return value as draw_circuit_pattern(). An SvgCanvas
+    gets the pattern drawn as shapes instead.
+    """
+    if isinstance(canvas, SvgCanvas):
+        return draw_circuit_pattern(canvas, x, y, width, height, accent_color)
+
+    tile, spill, (chip_x, chip_y, chip_width, chip_height) = _circuit_tile(
+        width, height, tuple(accent_color))
+    canvas.paste(tile, (x, y))
+    if spill:
+        overlay, (dx, dy) = spill
+        canvas.paste(overlay, (x + dx, y + dy), overlay)
+    return x + chip_x, y + chip_y, chip_width, chip_height
+
+@functools.lru_cache(maxsize=CARD_CACHE_SIZE)
+def _bordered_card(width, height, background_color, border_color, border_width):
+    from PIL import Image, ImageDraw
+
+    card = Image.new('RGB', (width, height), background_color)
+    ImageDraw.Draw(card).rectangle([0, 0, width - 1, height - 1], outline=border_color,
+                                   width=border_width)
+    return card
+
+def new_canvas(width, height, background, border_color=None, border_width=0, vector=False):
+    """A blank card for a layout to draw on: a Pillow image, or an SvgCanvas with vector."""
+    from PIL import Image
+
+    if vector:
+        canvas = SvgCanvas(width, height, background)
+        if border_color:
+            canvas.rectangle([0, 0, width - 1, height - 1], outline=border_color, width=border_width)
+        return canvas
+
+    if border_color:
+        # Background and border come pre-rendered
+        return _bordered_card(width, height, background, border_color, border_width).copy()
+    return Image.new('RGB', (width, height), background)
+
+def canvas_draw(canvas):
+    """The ImageDraw of a raster canvas; an SvgCanvas takes the same calls itself."""
+    from PIL import ImageDraw
+
+    return canvas if isinstance(canvas, SvgCanvas) else ImageDraw.Draw(canvas)
+
+def _crop_to_fill(image, width, height):
+    """Resize a ResolvedImage to cover width x height and crop the overflow, centred."""
+    original_width, original_height = image.size
+    original_ratio = original_width / original_height
+    if original_ratio > width / height:
+        # Image is wider than target - fit to height, crop width
+        new_width = int(height * original_ratio)
+        crop_x = (new_width - width) // 2
+        return image.resized((new_width, height)).crop((crop_x, 0, crop_x + width, height))
+
+    # Image is taller than target - fit to width, crop height
+    new_height = int(width / original_ratio)
+    crop_y = (new_height - height) // 2
+    return image.resized((width, new_height)).crop((0, crop_y, width, crop_y + height))
+
+def place_image(canvas, image, box, fit, image_cache=None):
+    """Draw og:image (a ResolvedImage, or a LinkedImage for SVG) into box (x, y, width, height).
+
+    fit 'scale' stretches it to the box, 'contain' scales it down to fit and
+    centres it, 'cover' fills the box and crops the overflow. Raster canvases
+    get resized pixels, cached as variants in image_cache; an SvgCanvas
+    references the image and leaves the scaling to the viewer.
+    """
+    x, y, width, height = box
+    if isinstance(canvas, SvgCanvas):
+        href = _svg_image_href(image)
+        if fit == 'contain':
+            canvas.image(href, *_svg_contain_box(image.size, box))
+        else:
+            canvas.image(href, box, fit='slice' if fit == 'cover' else 'none')
+        return
+
+    if fit == 'scale':
+        og_image = cached_variant(image_cache, image.url, f"scale-{width}x{height}",
+                                  lambda: image.resized((width, height)))
+        canvas.paste(og_image, (x, y))
+    elif fit == 'contain':
+        og_image = cached_variant(image_cache, image.url, f"contain-{width}x{height}",
+                                  lambda: image.fitted((width, height)))
+        img_w, img_h = og_image.size
+        canvas.paste(og_image, (x + (width - img_w) // 2, y + (height - img_h) // 2))
+    else:
+        og_image = cached_variant(image_cache, image.url, f"cover-{width}x{height}",
+                                  lambda: _crop_to_fill(image, width, height))
+        canvas.paste(og_image, (x, y))
+
+def create_og_standard_preview(og_data, use_circuit=False, accent_color=None, session=None,
+                               image=None, image_cache=None, vector=False):
+    """Create a standard 1200x630 Open Graph image (an SvgCanvas with vector)."""
     width, height = OG_STANDARD_WIDTH, OG_STANDARD_HEIGHT
 
     # Default accent color (teal)
@@ -473,8 +2274,8 @@ def create_og_standard_preview(og_data, use_circuit=False, accent_color=None):
         accent_color = (0, 148, 143)
 
     # Create canvas
-    canvas = Image.new('RGB', (width, height), (255, 255, 255))
-    draw = ImageDraw.Draw(canvas)
+    canvas = new_canvas(width, height, (255, 255, 255), vector=vector)
+    draw = canvas_draw(canvas)
 
     # Layout: Left side (55%) for content, Right side (45%) for image/pattern
     content_width = int(width * 0.55)
@@ -482,8 +2283,8 @@ def create_og_standard_preview(og_data, use_circuit=False, accent_color=None):
 
     if use_circuit:
         # Draw circuit pattern on right side
-        chip_x, chip_y, chip_w, chip_h = draw_circuit_pattern(
-            draw, content_width, 0, image_area_width, height, accent_color
+        chip_x, chip_y, chip_w, chip_h = paste_circuit_pattern(
+            canvas, content_width, 0, image_area_width, height, accent_color
         )
 
         # Add text inside chip if space allows
@@ -497,29 +2298,21 @@ def create_og_standard_preview(og_data, use_circuit=False, accent_color=None):
         # Try to download and place the OG image
         if og_data.get('image'):
             try:
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                }
-                response = requests.get(og_data['image'], headers=headers, timeout=10)
-                og_image = Image.open(io.BytesIO(response.content))
-
-                # Resize to fit the image area
-                og_image.thumbnail((image_area_width, height), Image.Resampling.LANCZOS)
-
-                # Center the image in the right area
-                img_w, img_h = og_image.size
-                paste_x = content_width + (image_area_width - img_w) // 2
-                paste_y = (height - img_h) // 2
+                image = image or resolve_image(og_data['image'], session=session, image_cache=image_cache)
+                image.size  # Raises for an image that failed to download or decode
 
                 # Fill background with subtle color
                 draw.rectangle([content_width, 0, width, height], fill=(245, 245, 245))
-                canvas.paste(og_image, (paste_x, paste_y))
+
+                # Fit the image to the right area, centered
+                place_image(canvas, image, (content_width, 0, image_area_width, height), 'contain',
+                            image_cache=image_cache)
             except Exception as e:
                 print(f"Could not load image: {e}, using circuit pattern instead")
-                draw_circuit_pattern(draw, content_width, 0, image_area_width, height, accent_color)
+                paste_circuit_pattern(canvas, content_width, 0, image_area_width, height, accent_color)
         else:
             # No image - use circuit pattern
-            draw_circuit_pattern(draw, content_width, 0, image_area_width, height, accent_color)
+            paste_circuit_pattern(canvas, content_width, 0, image_area_width, height, accent_color)
 
     # Draw accent bar on left edge
     draw.rectangle([0, 0, 8, height], fill=accent_color)
@@ -578,26 +2371,25 @@ def create_og_standard_preview(og_data, use_circuit=False, accent_color=None):
 
     return canvas
 
-def create_image_only_preview(og_data):
-    """Create an image-only preview for high-quality images."""
+def create_image_only_preview(og_data, session=None, image=None, image_cache=None, vector=False):
+    """Create an image-only preview for high-quality images (an SvgCanvas with vector)."""
     # New dimensions as requested
     width, height = COMPACT_WIDTH, COMPACT_HEIGHT
 
+    # Resolved outside the try so the fallback below reuses it rather than downloading again
+    image = image or resolve_image(og_data['image'], session=session, image_cache=image_cache)
+
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        }
-        response = requests.get(og_data['image'], headers=headers, timeout=10)
-        og_image = Image.open(io.BytesIO(response.content))
+        original_width, original_height = image.size
 
-        print(f"Original image size: {og_image.width}x{og_image.height}")
+        print(f"Original image size: {original_width}x{original_height}")
 
         # Calculate aspect ratios
-        original_ratio = og_image.width / og_image.height
+        original_ratio = original_width / original_height
         target_ratio = width / height
 
         # Create canvas
-        canvas = Image.new('RGB', (width, height), '#ffffff')  # White background
+        canvas = new_canvas(width, height, '#ffffff', vector=vector)  # White background
 
         if original_ratio <= 1.0:
             # Square or tall image - add text on left side
@@ -618,13 +2410,13 @@ def create_image_only_preview(og_data):
                 new_width = int(height * original_ratio)
 
             # Resize and position image on right side
-            og_image = og_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             paste_x = text_width + (image_width - new_width) // 2
             paste_y = (height - new_height) // 2
-            canvas.paste(og_image, (paste_x, paste_y))
+            place_image(canvas, image, (paste_x, paste_y, new_width, new_height), 'scale',
+                        image_cache=image_cache)
 
             # Add title text on left side
-            draw = ImageDraw.Draw(canvas)
+            draw = canvas_draw(canvas)
             title_font = get_font(16)
             site_font = get_font(10)
 
@@ -664,13 +2456,13 @@ def create_image_only_preview(og_data):
                 new_width = int(height * original_ratio)
 
             # Resize and center
-            og_image = og_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
             paste_x = (width - new_width) // 2
             paste_y = (height - new_height) // 2
-            canvas.paste(og_image, (paste_x, paste_y))
+            place_image(canvas, image, (paste_x, paste_y, new_width, new_height), 'scale',
+                        image_cache=image_cache)
 
             # Add subtle attribution
-            draw = ImageDraw.Draw(canvas)
+            draw = canvas_draw(canvas)
             font_small = get_font(10)
 
             site_name = og_data.get('site_name', og_data.get('url', ''))
@@ -686,27 +2478,51 @@ def create_image_only_preview(og_data):
     except Exception as e:
         print(f"Failed to create image-only preview: {e}")
         # Fall back to regular preview
-        return create_link_preview_regular(og_data)
+        return create_link_preview_regular(og_data, session=session, image=image,
+                                           image_cache=image_cache, vector=vector)
+
+def create_link_preview(og_data, use_og_size=False, use_circuit=False, accent_color=None,
+                        session=None, image=None, image_cache=None, image_size=None,
+                        image_scoring=DEFAULT_IMAGE_SCORING, vector=False):
+    """Create a link preview PNG from Open Graph data.
+
+    With vector the layout is drawn on an SvgCanvas, which is returned in
+    place of the image (see create_svg_preview()).
 
-def create_link_preview(og_data, use_og_size=False, use_circuit=False, accent_color=None):
-    """Create a link preview PNG from Open Graph data."""
+    image may carry a ResolvedImage for og:image if it was already fetched;
+    otherwise it is fetched once here and shared by whichever renderer runs.
+    With image_scoring 'size', the image-only layout is chosen from the real
+    dimensions: image_size if known, else the header of the downloaded image,
+    or with use_circuit (where the image may go unused) a ranged probe.
+    """
 
     # If OG standard size requested, use the new function
     if use_og_size:
         print(f"Creating standard OG image ({OG_STANDARD_WIDTH}x{OG_STANDARD_HEIGHT})")
-        return create_og_standard_preview(og_data, use_circuit=use_circuit, accent_color=accent_color)
+        return create_og_standard_preview(og_data, use_circuit=use_circuit, accent_color=accent_color,
+                                          session=session, image=image, image_cache=image_cache,
+                                          vector=vector)
 
     # Check if we should create an image-only preview
     image_url = og_data.get('image')
-    if is_image_standalone_worthy(image_url, og_data):
+    if image_url and image_size is None and image_scoring == 'size':
+        if image is None and not use_circuit:
+            # Every layout shows og:image, so download it now rather than probe it too
+            image = resolve_image(image_url, session=session, image_cache=image_cache)
+        image_size = image_dimensions(og_data, image=image, session=session, image_cache=image_cache)
+    if is_image_standalone_worthy(image_url, og_data, image_size=image_size):
         print("High-quality image detected - creating image-only preview")
-        return create_image_only_preview(og_data)
+        return create_image_only_preview(og_data, session=session, image=image,
+                                         image_cache=image_cache, vector=vector)
 
     # Continue with regular preview
-    return create_link_preview_regular(og_data, use_circuit=use_circuit, accent_color=accent_color)
+    return create_link_preview_regular(og_data, use_circuit=use_circuit, accent_color=accent_color,
+                                       session=session, image=image, image_cache=image_cache,
+                                       vector=vector)
 
-def create_link_preview_regular(og_data, use_circuit=False, accent_color=None):
-    """Create the regular text+image preview."""
+def create_link_preview_regular(og_data, use_circuit=False, accent_color=None, session=None,
+                                image=None, image_cache=None, vector=False):
+    """Create the regular text+image preview (an SvgCanvas with vector)."""
     # Create canvas with compact dimensions (722 × 144)
     width, height = COMPACT_WIDTH, COMPACT_HEIGHT
     background_color = '#f8f5f5'  # Light pinkish background
@@ -715,18 +2531,15 @@ def create_link_preview_regular(og_data, use_circuit=False, accent_color=None):
     if accent_color is None:
         accent_color = (212, 165, 165)  # Muted red as tuple
 
-    canvas = Image.new('RGB', (width, height), background_color)
-    draw = ImageDraw.Draw(canvas)
+    border_width = 3
+    canvas = new_canvas(width, height, background_color, border_color, border_width, vector=vector)
+    draw = canvas_draw(canvas)
 
     # Load fonts
     title_font = get_font(20)
     desc_font = get_font(12)
     site_font = get_font(10)
 
-    # Add border
-    border_width = 3
-    draw.rectangle([0, 0, width-1, height-1], outline=border_color, width=border_width)
-
     # Content area with padding - adjusted for smaller dimensions
     padding = 15
 
@@ -738,17 +2551,14 @@ def create_link_preview_regular(og_data, use_circuit=False, accent_color=None):
 
     # Handle image area
     if use_circuit:
-        draw_circuit_pattern(draw, image_x, image_y, image_width, image_height, accent_color)
+        paste_circuit_pattern(canvas, image_x, image_y, image_width, image_height, accent_color)
     elif og_data.get('image'):
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-            }
-            response = requests.get(og_data['image'], headers=headers, timeout=10)
-            og_image = Image.open(io.BytesIO(response.content))
+            image = image or resolve_image(og_data['image'], session=session, image_cache=image_cache)
+            original_width, original_height = image.size
 
             # Check if image is reasonable for cropping
-            original_ratio = og_image.width / og_image.height
+            original_ratio = original_width / original_height
             target_ratio = image_width / image_height
 
             # If the image aspect ratio is very different from target, use fit-to-container instead of crop
@@ -756,42 +2566,18 @@ def create_link_preview_regular(og_data, use_circuit=False, accent_color=None):
 
             if ratio_difference > 1.5:  # Image aspect ratio is very different - don't crop aggressively
                 print(f"Image aspect ratio very different (original: {original_ratio:.2f}, target: {target_ratio:.2f}), using fit-to-container")
-                # Resize to fit within container while maintaining aspect ratio
-                og_image.thumbnail((image_width, image_height), Image.Resampling.LANCZOS)
-
-                # Center in the allocated space
-                img_w, img_h = og_image.size
-                paste_x = image_x + (image_width - img_w) // 2
-                paste_y = image_y + (image_height - img_h) // 2
-
                 # Fill background with a subtle color
                 draw.rectangle([image_x, image_y, image_x + image_width, image_y + image_height],
                               fill='#f5f5f5')
-                canvas.paste(og_image, (paste_x, paste_y))
 
-            else:
-                # Aspect ratios are similar enough - safe to crop
-                if original_ratio > target_ratio:
-                    # Image is wider than target - fit to height, crop width
-                    new_height = image_height
-                    new_width = int(new_height * original_ratio)
-                    og_image = og_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-                    # Crop to center
-                    crop_x = (new_width - image_width) // 2
-                    og_image = og_image.crop((crop_x, 0, crop_x + image_width, image_height))
-                else:
-                    # Image is taller than target - fit to width, crop height
-                    new_width = image_width
-                    new_height = int(new_width / original_ratio)
-                    og_image = og_image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+                # Fit within the container, centered, maintaining aspect ratio
+                place_image(canvas, image, (image_x, image_y, image_width, image_height), 'contain',
+                            image_cache=image_cache)
 
-                    # Crop to center
-                    crop_y = (new_height - image_height) // 2
-                    og_image = og_image.crop((0, crop_y, image_width, crop_y + image_height))
-
-                # Paste the image to fill the entire area
-                canvas.paste(og_image, (image_x, image_y))
+            else:
+                # Aspect ratios are similar enough - safe to crop to fill the entire area
+                place_image(canvas, image, (image_x, image_y, image_width, image_height), 'cover',
+                            image_cache=image_cache)
 
         except Exception as e:
             print(f"Could not load image: {e}")
@@ -853,6 +2639,174 @@ def create_link_preview_regular(og_data, use_circuit=False, accent_color=None):
 
     return canvas
 
+class SvgCanvas:
+    """Collects SVG markup through the part of the ImageDraw API the layouts use.
+
+    Boxes are inclusive pixel boxes, as with ImageDraw, so draw_circuit_pattern()
+    and the layout code place shapes where Pillow would draw them.
+    """
+
+    def __init__(self, width, height, background):
+        self.width = width
+        self.height = height
+        self.elements = [f'<rect width="{width}" height="{height}" fill="{_svg_color(background)}"/>']
+
+    def _rect(self, xy, fill, outline, width, radius):
+        x0, y0, x1, y1 = xy
+        # ImageDraw strokes the outline inside the box, SVG centres it on the edge
+        inset = width / 2 if outline and width else 0
+        attributes = (f'x="{_svg_number(x0 + inset)}" y="{_svg_number(y0 + inset)}" '
+                      f'width="{_svg_number(x1 - x0 + 1 - 2 * inset)}" '
+                      f'height="{_svg_number(y1 - y0 + 1 - 2 * inset)}"')
+        if radius:
+            attributes += f' rx="{_svg_number(radius)}"'
+        self.elements.append(f'<rect {attributes}{_svg_paint(fill, outline, width)}/>')
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        self._rect(xy, fill, outline, width, 0)
+
+    def rounded_rectangle(self, xy, radius=0, fill=None, outline=None, width=1):
+        self._rect(xy, fill, outline, width, radius)
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        x0, y0, x1, y1 = xy
+        self.elements.append(
+            f'<ellipse cx="{_svg_number((x0 + x1 + 1) / 2)}" cy="{_svg_number((y0 + y1 + 1) / 2)}" '
+            f'rx="{_svg_number((x1 - x0 + 1) / 2)}" ry="{_svg_number((y1 - y0 + 1) / 2)}"'
+            f'{_svg_paint(fill, outline, width)}/>')
+
+    def line(self, xy, fill=None, width=0):
+        # Pixel coordinates address pixel centres
+        (x0, y0), (x1, y1) = xy
+        self.elements.append(
+            f'<line x1="{_svg_number(x0 + 0.5)}" y1="{_svg_number(y0 + 0.5)}" '
+            f'x2="{_svg_number(x1 + 0.5)}" y2="{_svg_number(y1 + 0.5)}" '
+            f'stroke="{_svg_color(fill)}" stroke-width="{max(1, width)}"/>')
+
+    def text(self, xy, text, fill=None, font=None, anchor=None):
+        """Text at xy with an ImageDraw anchor ('la', 'mm' or 'rb'), in the size and weight of font."""
+        x, y = xy
+        anchor = anchor or 'la'
+        font = font or get_font(10)
+        ascent, descent = font.getmetrics()
+        baseline = {'a': y + ascent, 'm': y + (ascent - descent) / 2, 'b': y - descent}[anchor[1]]
+        text_anchor = {'l': 'start', 'm': 'middle', 'r': 'end'}[anchor[0]]
+        weight = ' font-weight="bold"' if _svg_font_is_bold(font) else ''
+        self.elements.append(
+            f'<text x="{_svg_number(x)}" y="{_svg_number(baseline)}" font-size="{_svg_number(font.size)}"'
+            f'{weight} text-anchor="{text_anchor}" fill="{_svg_color(fill)}">{html_lib.escape(text)}</text>')
+
+    def textbbox(self, xy, text, font=None, anchor=None):
+        """Bounding box of text as the raster font measures it."""
+        from PIL import Image, ImageDraw
+
+        return ImageDraw.Draw(Image.new('1', (1, 1))).textbbox(xy, text, font=font or get_font(10),
+                                                                 anchor=anchor)
+
+    def image(self, href, box, fit='none'):
+        """Place an image in box (x, y, width, height); fit is an SVG preserveAspectRatio mode."""
+        x, y, width, height = box
+        aspect = {'none': 'none', 'meet': 'xMidYMid meet', 'slice': 'xMidYMid slice'}[fit]
+        self.elements.append(
+            f'<image x="{_svg_number(x)}" y="{_svg_number(y)}" width="{_svg_number(width)}" '
+            f'height="{_svg_number(height)}" preserveAspectRatio="{aspect}" '
+            f'xlink:href="{html_lib.escape(href)}"/>')
+
+    def tostring(self):
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                f'width="{self.width}" height="{self.height}" viewBox="0 0 {self.width} {self.height}" '
+                f'font-family="{SVG_FONT_FAMILY}">\n'
+                + '\n'.join(self.elements) + '\n</svg>\n')
+
+def _svg_number(value):
+    return f"{value:g}"
+
+def _svg_color(color):
+    if isinstance(color, tuple):
+        return '#{:02x}{:02x}{:02x}'.format(*color[:3])
+    return color
+
+def _svg_paint(fill, outline, width):
+    paint = f' fill="{_svg_color(fill)}"' if fill else ' fill="none"'
+    if outline and width:
+        paint += f' stroke="{_svg_color(outline)}" stroke-width="{width}"'
+    return paint
+
+def _svg_font_is_bold(font):
+    try:
+        return 'bold' in (font.getname()[1] or '').lower()
+    except Exception:
+        return False
+
+def _svg_image_href(image):
+    """og:image as an SVG href: the URL of a LinkedImage, else the downloaded bytes as a data URI."""
+    from PIL import Image
+
+    if isinstance(image, LinkedImage):
+        return image.url
+    mime_type = Image.MIME.get(Image.open(io.BytesIO(image.data)).format, 'application/octet-stream')
+    return f"data:{mime_type};base64,{base64.b64encode(image.data).decode('ascii')}"
+
+class LinkedImage:
+    """og:image linked by URL from an SVG card instead of embedded; never downloaded.
+
+    size is the declared size or the probed header (see image_dimensions()).
+    It raises when neither is known, so the layouts fall back just as they
+    do for an image that failed to download.
+    """
+
+    def __init__(self, og_data, image=None, image_size=None, session=None, image_cache=None):
+        self.url = og_data['image']
+        self._og_data = og_data
+        self._image = image
+        self._size = image_size
+        self._probed = image_size is not None
+        self._session = session
+        self._image_cache = image_cache
+
+    @property
+    def size(self):
+        if not self._probed:
+            self._probed = True
+            self._size = image_dimensions(self._og_data, image=self._image, session=self._session,
+                                          image_cache=self._image_cache)
+        if self._size is None:
+            raise ValueError("image size unknown")
+        return self._size
+
+def _svg_contain_box(image_size, area):
+    """Box of an image scaled down to fit area (x, y, width, height) and centred, like fitted()."""
+    x, y, width, height = area
+    if image_size is None:
+        return area, 'meet'
+    image_width, image_height = image_size
+    scale = min(width / image_width, height / image_height, 1)
+    new_width = max(1, round(image_width * scale))
+    new_height = max(1, round(image_height * scale))
+    return (x + (width - new_width) // 2, y + (height - new_height) // 2, new_width, new_height), 'none'
+
+def create_svg_preview(og_data, use_og_size=False, use_circuit=False, accent_color=None,
+                       session=None, image=None, image_cache=None, image_size=None,
+                       image_scoring=DEFAULT_IMAGE_SCORING, embed_images=None):
+    """SVG counterpart of create_link_preview(): the same layouts drawn on an SvgCanvas.
+
+    Nothing is rasterized or encoded. og:image is embedded as a data URI or,
+    with embed_images False, linked by URL; embed_images defaults to the
+    encoder's svg_images setting. Returns the SVG document as a string.
+    """
+    if embed_images is None:
+        embed_images = get_encoder().svg_images == 'embed'
+
+    if og_data.get('image') and not embed_images:
+        image = LinkedImage(og_data, image=image, image_size=image_size, session=session,
+                            image_cache=image_cache)
+
+    canvas = create_link_preview(og_data, use_og_size=use_og_size, use_circuit=use_circuit,
+                                 accent_color=accent_color, session=session, image=image,
+                                 image_cache=image_cache, image_size=image_size,
+                                 image_scoring=image_scoring, vector=True)
+    return canvas.tostring()
+
 def sanitize_filename(title, as_pdf=False):
     """Convert title to a safe filename."""
     # Remove or replace problematic characters
@@ -875,17 +2829,16 @@ def sanitize_filename(title, as_pdf=False):
 def save_as_pdf(canvas, output_path):
     """Convert PIL Image canvas to PDF and save."""
     try:
-        # Convert PIL Image to PDF
-        canvas_rgb = canvas.convert('RGB')
-        canvas_rgb.save(output_path, 'PDF', resolution=100.0)
+        with open(output_path, 'wb') as f:
+            write_preview(canvas, f, 'pdf')
         return True
     except Exception as e:
         print(f"Failed to save as PDF: {e}")
         return False
 
-def export_og_json(og_data, output_path):
-    """Export Open Graph data as structured JSON."""
-    json_data = {
+def og_json_data(og_data):
+    """Structure Open Graph data the way --json exports it."""
+    return {
         "openGraph": {
             "og:title": og_data.get('title', ''),
             "og:description": og_data.get('description', ''),
@@ -913,11 +2866,19 @@ def export_og_json(og_data, output_path):
         }
     }
 
+def export_og_json(og_data, output_path):
+    """Export Open Graph data as structured JSON."""
+    json_data = og_json_data(og_data)
+
     with open(output_path, 'w', encoding='utf-8') as f:
         json.dump(json_data, f, indent=2, ensure_ascii=False)
 
     return json_data
 
+def og_json_bytes(og_data):
+    """The JSON export_og_json() writes, as UTF-8 bytes."""
+    return json.dumps(og_json_data(og_data), indent=2, ensure_ascii=False).encode('utf-8')
+
 def parse_color(color_str):
     """Parse color string to RGB tuple."""
     if not color_str:
@@ -943,7 +2904,1386 @@ def parse_color(color_str):
 
     return None
 
+def resolve_output_dir(output_dir=None):
+    """Return the directory previews are written to."""
+    if output_dir:
+        return output_dir
+    elif os.path.exists('/Users'):
+        # macOS - use Desktop
+        return os.path.expanduser('~/Desktop')
+    else:
+        # Linux/other - use current directory
+        return os.getcwd()
+
+def output_filename_for(og_data, output=None, as_pdf=False):
+    """Pick the output filename, either from the user or from the page title."""
+    if output:
+        output_filename = output
+        # Ensure correct extension for PDF mode
+        if as_pdf and not output_filename.lower().endswith('.pdf'):
+            output_filename = output_filename.rsplit('.', 1)[0] + '.pdf'
+        elif not as_pdf and not output_filename.lower().endswith('.png'):
+            output_filename = output_filename.rsplit('.', 1)[0] + '.png'
+        return output_filename
+
+    return sanitize_filename(og_data['title'], as_pdf=as_pdf)
+
+def avif_available():
+    """Whether Pillow can encode AVIF, natively (Pillow >= 11.2) or through pillow-avif-plugin."""
+    from PIL import Image
+
+    try:
+        import pillow_avif  # noqa: F401 - registers the AVIF plugin with older Pillow
+    except ImportError:
+        pass
+    Image.init()
+    return 'AVIF' in Image.SAVE
+
+class PreviewEncoder:
+    """Encodes rendered previews with the save() options picked for this deployment.
+
+    effort is one of ENCODER_EFFORTS (see ENCODER_PRESETS); quality (1-100)
+    overrides the default of the lossy formats and png_compression (0-9) the
+    PNG zlib level. svg_images, one of SVG_IMAGE_MODES, is how SVG output
+    includes og:image.
+    """
+
+    def __init__(self, effort=DEFAULT_ENCODER_EFFORT, quality=None, png_compression=None,
+                 svg_images=DEFAULT_SVG_IMAGES):
+        if effort not in ENCODER_EFFORTS:
+            raise ValueError(f"Unknown effort '{effort}', choose from: {', '.join(ENCODER_EFFORTS)}")
+        if quality is not None and not 1 <= quality <= 100:
+            raise ValueError(f"Quality must be between 1 and 100, got {quality}")
+        if png_compression is not None and not 0 <= png_compression <= 9:
+            raise ValueError(f"PNG compression must be between 0 and 9, got {png_compression}")
+        if svg_images not in SVG_IMAGE_MODES:
+            raise ValueError(f"Unknown SVG image mode '{svg_images}', choose from: {', '.join(SVG_IMAGE_MODES)}")
+
+        self.effort = effort
+        self.quality = quality
+        self.png_compression = png_compression
+        self.svg_images = svg_images
+
+    def settings(self):
+        """Constructor arguments, e.g. to set up the same encoder in a render process."""
+        return {'effort': self.effort, 'quality': self.quality,
+                'png_compression': self.png_compression, 'svg_images': self.svg_images}
+
+    def options(self, output_format):
+        """Pillow save() options for output_format."""
+        options = dict(ENCODER_PRESETS[output_format][self.effort])
+        if output_format == 'png':
+            if self.png_compression is not None:
+                options['compress_level'] = self.png_compression
+        elif self.quality is not None:
+            options['quality'] = self.quality
+        return options
+
+    def write(self, preview, fp, output_format='png'):
+        """Encode preview in one of OUTPUT_FORMATS into a binary file object."""
+        if output_format not in ENCODER_PRESETS:
+            raise ValueError(f"Cannot encode a raster preview as '{output_format}', "
+                             f"choose from: {', '.join(ENCODER_PRESETS)}")
+        if output_format == 'avif' and not avif_available():
+            raise ValueError("AVIF output needs Pillow >= 11.2 or: pip install pillow-avif-plugin")
+
+        # JPEG (also inside PDF) has no alpha channel
+        if output_format in ('jpeg', 'pdf') and preview.mode not in ('RGB', 'L'):
+            preview = preview.convert('RGB')
+        preview.save(fp, output_format.upper(), **self.options(output_format))
+
+_default_encoder = PreviewEncoder()
+
+def configure_encoder(**options):
+    """Replace the process-wide encoder with one built from PreviewEncoder options."""
+    global _default_encoder
+    _default_encoder = PreviewEncoder(**options)
+    return _default_encoder
+
+def get_encoder():
+    """Return the process-wide encoder."""
+    return _default_encoder
+
+def write_preview(preview, fp, output_format='png'):
+    """Encode a rendered preview in one of OUTPUT_FORMATS into a binary file object."""
+    get_encoder().write(preview, fp, output_format)
+
+def encode_preview(preview, output_format='png'):
+    """Encode a rendered preview in one of OUTPUT_FORMATS and return the bytes."""
+    buffer = io.BytesIO()
+    write_preview(preview, buffer, output_format)
+    return buffer.getvalue()
+
+def save_preview(preview, output_path, as_pdf=False):
+    """Save a rendered preview as PDF or PNG and return the path written."""
+    if as_pdf:
+        if save_as_pdf(preview, output_path):
+            print(f"Link preview PDF saved to: {output_path}")
+            return output_path
+
+        # Fallback to PNG if PDF fails
+        png_path = output_path.replace('.pdf', '.png')
+        with open(png_path, 'wb') as f:
+            write_preview(preview, f, 'png')
+        print(f"PDF export failed, saved PNG to: {png_path}")
+        return png_path
+
+    with open(output_path, 'wb') as f:
+        write_preview(preview, f, 'png')
+    print(f"Link preview saved to: {output_path}")
+    return output_path
+
+def encode_batch_preview(preview, filename, as_pdf=False):
+    """Encode a preview the way save_preview() saves it; returns (filename, bytes)."""
+    if as_pdf:
+        try:
+            return filename, encode_preview(preview, 'pdf')
+        except Exception as e:
+            # Fallback to PNG if PDF fails
+            print(f"Failed to save as PDF: {e}")
+            filename = filename.replace('.pdf', '.png')
+    return filename, encode_preview(preview, 'png')
+
+def encode_pdf_card(preview):
+    """JPEG bytes of a card for a PdfBundle, as Pillow embeds images in single-card PDFs."""
+    buffer = io.BytesIO()
+    quality = get_encoder().quality
+    preview.convert('RGB').save(buffer, 'JPEG', **({'quality': quality} if quality else {}))
+    return buffer.getvalue()
+
+class PdfBundle:
+    """A multi-page PDF of many cards, written to disk as the cards arrive.
+
+    Each card goes into the file straight away as a JPEG image object; only
+    its object number and size stay in memory. close() lays the cards out in
+    the order of the `order` URLs (others after them, as they arrived): one
+    card per page at the card's own size (100 dpi, like single-card PDFs), or
+    cards_per_page stacked on page_size sheets. Then it writes the page tree,
+    the cross-reference table and the trailer. Safe to use from many threads.
+    """
+
+    def __init__(self, path, cards_per_page=1, page_size=DEFAULT_PDF_PAGE_SIZE, order=None):
+        if cards_per_page < 1:
+            raise ValueError(f"Cards per page must be at least 1, got {cards_per_page}")
+        if page_size not in PDF_PAGE_SIZES:
+            raise ValueError(f"Unknown page size '{page_size}', choose from: {', '.join(PDF_PAGE_SIZES)}")
+
+        self.path = path
+        self.cards_per_page = cards_per_page
+        self.page_size = page_size
+        self.pages = 0
+        self._order = {}
+        for index, url in enumerate(order or []):
+            self._order.setdefault(url, index)
+        self._cards = []
+        self._lock = threading.Lock()
+
+        self._file = open(path, 'wb')
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        # Objects 1 and 2, the catalog and the page tree, are written last
+        self._offsets = [None, None]
+
+    def _object(self, dictionary, stream=None, number=None):
+        if number is None:
+            self._offsets.append(None)
+            number = len(self._offsets)
+        self._offsets[number - 1] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n{dictionary}\n".encode('latin-1'))
+        if stream is not None:
+            self._file.write(b'stream\n' + stream + b'\nendstream\n')
+        self._file.write(b'endobj\n')
+        return number
+
+    def add_image(self, jpeg, size, url=None):
+        """Append a card already encoded with encode_pdf_card(), e.g. in a render process."""
+        width, height = size
+        with self._lock:
+            number = self._object(
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /DCTDecode /Length {len(jpeg)} >>",
+                jpeg)
+            self._cards.append((self._order.get(url, len(self._order)), len(self._cards), number, size))
+
+    def add(self, preview, url=None):
+        """Append a rendered card; url places it in the bundle's order."""
+        self.add_image(encode_pdf_card(preview), preview.size, url=url)
+
+    def _layout(self, cards):
+        """Yield (page_width, page_height, [(object number, x, y, width, height), ...]) in points."""
+        scale = 72 / 100
+        if self.cards_per_page == 1:
+            for _, _, number, (width, height) in cards:
+                yield width * scale, height * scale, [(number, 0, 0, width * scale, height * scale)]
+            return
+
+        page_width, page_height = PDF_PAGE_SIZES[self.page_size]
+        margin = PDF_BUNDLE_MARGIN
+        slot_width = page_width - 2 * margin
+        slot_height = (page_height - margin * (self.cards_per_page + 1)) / self.cards_per_page
+        for start in range(0, len(cards), self.cards_per_page):
+            placed = []
+            for slot, (_, _, number, (width, height)) in enumerate(cards[start:start + self.cards_per_page]):
+                fit = min(scale, slot_width / width, slot_height / height)
+                card_width, card_height = width * fit, height * fit
+                top = page_height - margin - slot * (slot_height + margin)
+                placed.append((number, margin + (slot_width - card_width) / 2, top - card_height,
+                               card_width, card_height))
+            yield page_width, page_height, placed
+
+    def close(self):
+        """Write the pages and close the file; returns the number of pages.
+
+        Without any cards there is nothing to write: the partial file is
+        removed and 0 returned.
+        """
+        with self._lock:
+            if self._file.closed:
+                return self.pages
+
+            if not self._cards:
+                self._file.close()
+                os.remove(self.path)
+                return 0
+
+            kids = []
+            for page_width, page_height, placed in self._layout(sorted(self._cards)):
+                content = ''.join(f"q {w:.2f} 0 0 {h:.2f} {x:.2f} {y:.2f} cm /Im{number} Do Q\n"
+                                  for number, x, y, w, h in placed).encode('latin-1')
+                contents = self._object(f"<< /Length {len(content)} >>", content)
+                images = ' '.join(f"/Im{number} {number} 0 R" for number, *_ in placed)
+                kids.append(self._object(
+                    f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+                    f"/Resources << /XObject << {images} >> >> /Contents {contents} 0 R >>"))
+
+            self._object(f"<< /Type /Pages /Kids [{' '.join(f'{kid} 0 R' for kid in kids)}] "
+                         f"/Count {len(kids)} >>", number=2)
+            self._object("<< /Type /Catalog /Pages 2 0 R >>", number=1)
+
+            xref = self._file.tell()
+            self._file.write(f"xref\n0 {len(self._offsets) + 1}\n0000000000 65535 f \n".encode('latin-1'))
+            self._file.write(''.join(f"{offset:010d} 00000 n \n" for offset in self._offsets).encode('latin-1'))
+            self._file.write(f"trailer\n<< /Size {len(self._offsets) + 1} /Root 1 0 R >>\n"
+                             f"startxref\n{xref}\n%%EOF\n".encode('latin-1'))
+            self._file.close()
+
+            self.pages = len(kids)
+            return self.pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def archive_format_for(path):
+    """The ARCHIVE_FORMATS format ('zip', 'tar' or 'tar.gz') of an archive path's extension."""
+    lower_path = path.lower()
+    for extension, archive_format in ARCHIVE_FORMATS.items():
+        if lower_path.endswith(extension):
+            return archive_format
+    raise ValueError(f"Unknown archive type '{path}', use one of: {', '.join(ARCHIVE_FORMATS)}")
+
+class ArchiveSink:
+    """Batch output files streamed into one tar or zip archive instead of a directory.
+
+    The format follows the path's extension (see ARCHIVE_FORMATS). Each file
+    is appended as soon as it is produced, so the archive is one sequential
+    write; only names, URLs and sizes stay in memory. close() adds
+    manifest.json, listing every file with the URL it came from. Safe to use
+    from many threads.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.archive_format = archive_format_for(path)
+        self.files = []
+        self._names = {ARCHIVE_MANIFEST}
+        self._lock = threading.Lock()
+
+        if self.archive_format == 'zip':
+            import zipfile
+            self._archive = zipfile.ZipFile(path, 'w')
+        else:
+            import tarfile
+            self._archive = tarfile.open(path, 'w:gz' if self.archive_format == 'tar.gz' else 'w')
+
+    def _write(self, name, data):
+        if self.archive_format == 'zip':
+            import zipfile
+            member = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            member.external_attr = 0o644 << 16
+            # Images are compressed already
+            member.compress_type = (zipfile.ZIP_DEFLATED if name.endswith(ARCHIVE_DEFLATED_EXTENSIONS)
+                                    else zipfile.ZIP_STORED)
+            self._archive.writestr(member, data)
+        else:
+            import tarfile
+            member = tarfile.TarInfo(name)
+            member.size = len(data)
+            member.mtime = int(time.time())
+            member.mode = 0o644
+            self._archive.addfile(member, io.BytesIO(data))
+
+    def add(self, name, data, url=None):
+        """Append one file and return the name it was stored under.
+
+        A name already in the archive gets a _2, _3, ... suffix.
+        """
+        with self._lock:
+            if self._archive is None:
+                raise ValueError(f"Archive {self.path} is already closed")
+            name = _unique_filename(name, self._names)
+            self._write(name, data)
+            self.files.append({'name': name, 'url': url, 'bytes': len(data)})
+        return name
+
+    def close(self):
+        """Write the manifest and finish the archive; returns the number of files added."""
+        with self._lock:
+            if self._archive is not None:
+                manifest = json.dumps({'files': self.files}, indent=2, ensure_ascii=False)
+                self._write(ARCHIVE_MANIFEST, manifest.encode('utf-8'))
+                self._archive.close()
+                self._archive = None
+            return len(self.files)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_output(data, output_dir, filename, archive=None, url=None):
+    """Write one batch output file to output_dir, or into archive (an ArchiveSink).
+
+    Returns the path written; for an archive, the stored name under its path.
+    """
+    if archive is not None:
+        return os.path.join(archive.path, archive.add(filename, data, url=url))
+
+    output_path = os.path.join(output_dir, filename)
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return output_path
+
+def _export_json(og_data, output_dir, filename, archive=None, url=None):
+    if archive is not None:
+        return write_output(og_json_bytes(og_data), output_dir, filename, archive=archive, url=url)
+
+    json_path = os.path.join(output_dir, filename)
+    export_og_json(og_data, json_path)
+    return json_path
+
+def read_url_list(source):
+    """Read URLs (one per line) from a file, or from stdin when source is '-'.
+
+    Blank lines and lines starting with '#' are skipped.
+    """
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            urls.append(line)
+    return urls
+
+def _unique_filename(filename, used_names):
+    """Return filename, suffixed with _2, _3, ... if it was already taken."""
+    base, ext = os.path.splitext(filename)
+    candidate = filename
+    counter = 2
+    while candidate.lower() in used_names:
+        candidate = f"{base}_{counter}{ext}"
+        counter += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+def image_needed(og_data, use_og_size=False, use_circuit=False, image_size=None):
+    """Whether the layout create_link_preview() will pick is going to show og:image."""
+    image_url = og_data.get('image')
+    return bool(image_url) and (not use_circuit or
+                                (not use_og_size and
+                                 is_image_standalone_worthy(image_url, og_data, image_size=image_size)))
+
+def images_needed(og_data, sizes, use_circuit=False, image_size=None):
+    """Whether og:image is shown by the layout of any of sizes (see OUTPUT_SIZES)."""
+    return any(image_needed(og_data, use_og_size=size == 'og', use_circuit=use_circuit,
+                            image_size=image_size)
+               for size in sizes)
+
+def prefetch_image(og_data, use_og_size=False, use_circuit=False, image_scoring=DEFAULT_IMAGE_SCORING,
+                   session=None, image_cache=None, sizes=None):
+    """Do all the network work create_link_preview() would do for og:image up front.
+
+    With sizes (see OUTPUT_SIZES) the work is done once for all of them
+    instead of for the size picked by use_og_size. Returns (image,
+    image_size, image_scoring) to pass to create_link_preview(), which then
+    renders without touching the network.
+    """
+    sizes = sizes or ['og' if use_og_size else 'compact']
+    image_url = og_data.get('image')
+    image_size = None
+    if image_url and use_circuit and 'compact' in sizes and image_scoring == 'size':
+        image_size = image_dimensions(og_data, session=session, image_cache=image_cache)
+        if image_size is None:
+            # Scored by URL rather than probing again in the renderer
+            image_scoring = 'url'
+
+    image = None
+    if images_needed(og_data, sizes, use_circuit=use_circuit, image_size=image_size):
+        image = resolve_image(image_url, session=session, image_cache=image_cache)
+
+    return image, image_size, image_scoring
+
+def parse_output_list(value, choices):
+    """Parse a comma-separated --sizes/--formats value into a list of choices."""
+    items = []
+    for item in value.split(','):
+        item = item.strip().lower()
+        if not item:
+            continue
+        if item not in choices:
+            raise ValueError(f"Unknown value '{item}', choose from: {', '.join(choices)}")
+        if item not in items:
+            items.append(item)
+    if not items:
+        raise ValueError(f"Expected a comma-separated list of: {', '.join(choices)}")
+    return items
+
+def render_outputs(og_data, sizes, formats, image=None, **render_options):
+    """Render og_data once per size and encode each rendering in every format.
+
+    All sizes share one extraction and one download and decode of og:image
+    (prefetch it with prefetch_image(sizes=...)). Encodes run in threads while
+    the next size renders, as Pillow releases the GIL while encoding. SVG is
+    drawn as markup without rasterizing. Returns {(size, format): bytes} in
+    the requested order.
+    """
+    raster_formats = [output_format for output_format in formats
+                      if output_format not in VECTOR_FORMATS]
+
+    encodes = {}
+    with ThreadPoolExecutor(max_workers=len(sizes) * len(formats)) as encoders:
+        # Largest first, so smaller sizes resample its decode of og:image
+        for size in sorted(sizes, key=OUTPUT_SIZES.index, reverse=True):
+            if 'svg' in formats:
+                svg = create_svg_preview(og_data, use_og_size=size == 'og', image=image,
+                                         **render_options)
+                encodes[size, 'svg'] = encoders.submit(svg.encode, 'utf-8')
+            if not raster_formats:
+                continue
+
+            preview = create_link_preview(og_data, use_og_size=size == 'og', image=image,
+                                          **render_options)
+            for output_format in raster_formats:
+                # save() keeps its options on the image, so concurrent encodes need their own
+                encodes[size, output_format] = encoders.submit(encode_preview, preview.copy(),
+                                                               output_format)
+
+    return {(size, output_format): encodes[size, output_format].result()
+            for size in sizes for output_format in formats}
+
+def output_basename_for(og_data, output=None):
+    """Filename without extension for multi-output mode, from the user or the page title."""
+    filename = output or sanitize_filename(og_data['title'])
+    return filename.rsplit('.', 1)[0]
+
+def output_files(outputs, basename):
+    """Name render_outputs() results: a list of (filename, bytes).
+
+    Files are named <basename>.<format>, or <basename>_<size>.<format> when
+    several sizes were rendered.
+    """
+    several_sizes = len({size for size, _ in outputs}) > 1
+
+    files = []
+    for (size, output_format), data in outputs.items():
+        suffix = f"_{size}" if several_sizes else ''
+        files.append((f"{basename}{suffix}.{output_format}", data))
+    return files
+
+def save_outputs(og_data, outputs, output_dir, basename, export_json=False, archive=None, url=None):
+    """Write render_outputs() results (see output_files()) and return the paths written.
+
+    With archive, an ArchiveSink, they are stored there instead of output_dir.
+    """
+    paths = []
+    for filename, data in output_files(outputs, basename):
+        output_path = write_output(data, output_dir, filename, archive=archive, url=url)
+        print(f"Link preview saved to: {output_path}")
+        paths.append(output_path)
+
+    if export_json:
+        json_path = _export_json(og_data, output_dir, basename + '_og_data.json', archive=archive,
+                                 url=url)
+        print(f"OG data JSON saved to: {json_path}")
+
+    return paths
+
+def _reserve_filename(filename, used_names, names_lock):
+    # Several pages may share a title, so reserve names across workers
+    with names_lock:
+        return _unique_filename(filename, used_names)
+
+def _reserve_basename(og_data, used_names, names_lock):
+    return _reserve_filename(output_basename_for(og_data), used_names, names_lock)
+
+def process_url(url, output_dir, use_og_size=False, use_circuit=False, accent_color=None,
+                as_pdf=False, export_json=False, used_names=None, names_lock=None, session=None,
+                parser=None, http_cache=None, metadata_cache=None, image_cache=None,
+                image_scoring=DEFAULT_IMAGE_SCORING, sizes=None, formats=None, pdf_bundle=None,
+                archive=None):
+    """Extract, render and save the preview for one URL without prompting.
+
+    With sizes and formats, every combination is rendered from the one fetch.
+    With pdf_bundle, the preview is appended to that PdfBundle instead of
+    saved as a file; with archive, files go into that ArchiveSink rather
+    than output_dir. Returns the path (or list of paths) saved, or None if
+    extraction failed.
+    """
+    og_data = extract_og_data(url, session=session, parser=parser, http_cache=http_cache,
+                              metadata_cache=metadata_cache)
+    if not og_data:
+        print(f"Skipping {url}: no data extracted")
+        return None
+
+    if sizes:
+        image, image_size, image_scoring = prefetch_image(og_data, use_circuit=use_circuit,
+                                                          image_scoring=image_scoring,
+                                                          session=session, image_cache=image_cache,
+                                                          sizes=sizes)
+        outputs = render_outputs(og_data, sizes, formats, image=image, use_circuit=use_circuit,
+                                 accent_color=accent_color, session=session,
+                                 image_cache=image_cache, image_size=image_size,
+                                 image_scoring=image_scoring)
+        basename = _reserve_basename(og_data, used_names, names_lock)
+        return save_outputs(og_data, outputs, output_dir, basename, export_json=export_json,
+                            archive=archive, url=url)
+
+    preview = create_link_preview(og_data, use_og_size=use_og_size,
+                                  use_circuit=use_circuit, accent_color=accent_color,
+                                  session=session, image_cache=image_cache,
+                                  image_scoring=image_scoring)
+
+    if pdf_bundle is not None:
+        return add_to_bundle(pdf_bundle, url, og_data, preview, output_dir, export_json=export_json,
+                             used_names=used_names, names_lock=names_lock, archive=archive)
+
+    return save_batch_outputs(og_data, preview, output_dir, as_pdf=as_pdf,
+                              export_json=export_json, used_names=used_names,
+                              names_lock=names_lock, archive=archive, url=url)
+
+def save_batch_outputs(og_data, preview, output_dir, as_pdf=False, export_json=False,
+                       used_names=None, names_lock=None, archive=None, url=None):
+    """Save a batch preview (and optional JSON) under a title-derived filename.
+
+    With archive, an ArchiveSink, the files are stored there instead of output_dir.
+    """
+    output_filename = output_filename_for(og_data, as_pdf=as_pdf)
+    if used_names is not None:
+        output_filename = _reserve_filename(output_filename, used_names, names_lock)
+
+    if archive is None:
+        output_path = save_preview(preview, os.path.join(output_dir, output_filename), as_pdf=as_pdf)
+    else:
+        filename, data = encode_batch_preview(preview, output_filename, as_pdf=as_pdf)
+        output_path = write_output(data, output_dir, filename, archive=archive, url=url)
+        print(f"Link preview saved to: {output_path}")
+
+    if export_json:
+        json_filename = output_filename.rsplit('.', 1)[0] + '_og_data.json'
+        _export_json(og_data, output_dir, json_filename, archive=archive, url=url)
+
+    return output_path
+
+def add_to_bundle(pdf_bundle, url, og_data, preview, output_dir, export_json=False,
+                  used_names=None, names_lock=None, archive=None):
+    """Append a batch preview to pdf_bundle (JSON, if asked for, still goes to output_dir or archive)."""
+    pdf_bundle.add(preview, url=url)
+    if export_json:
+        _export_bundle_json(og_data, output_dir, used_names, names_lock, archive=archive, url=url)
+    return pdf_bundle.path
+
+def _export_bundle_json(og_data, output_dir, used_names, names_lock, archive=None, url=None):
+    basename = _reserve_basename(og_data, used_names, names_lock)
+    _export_json(og_data, output_dir, basename + '_og_data.json', archive=archive, url=url)
+
+def _submit_windowed(executor, fn, items, window):
+    """Run fn(item) on executor for each item, with at most window submitted at a time.
+
+    Yields (item, future) as each finishes. Only the window's futures exist
+    at once, so memory stays flat however many items there are.
+    """
+    pending = {}
+    items = iter(items)
+    while True:
+        for item in itertools.islice(items, window - len(pending)):
+            pending[executor.submit(fn, item)] = item
+        if not pending:
+            return
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+def run_batch(urls, output_dir, concurrency=DEFAULT_BATCH_CONCURRENCY, use_og_size=False,
+              use_circuit=False, accent_color=None, as_pdf=False, export_json=False, parser=None,
+              http_cache=None, metadata_cache=None, image_cache=None,
+              image_scoring=DEFAULT_IMAGE_SCORING, sizes=None, formats=None, pdf_bundle=None,
+              archive=None):
+    """Generate previews for many URLs using a bounded pool of worker threads.
+
+    Returns a (succeeded, failed) tuple of URL lists.
+    """
+    if archive is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    used_names = set()
+    names_lock = threading.Lock()
+
+    # One pooled session for all workers, with a connection per worker per host
+    session = create_http_session(pool_size=max(DEFAULT_POOL_SIZE, concurrency))
+
+    succeeded = []
+    failed = []
+
+    process = functools.partial(process_url, output_dir=output_dir,
+                                use_og_size=use_og_size, use_circuit=use_circuit,
+                                accent_color=accent_color, as_pdf=as_pdf,
+                                export_json=export_json, used_names=used_names,
+                                names_lock=names_lock, session=session, parser=parser,
+                                http_cache=http_cache, metadata_cache=metadata_cache,
+                                image_cache=image_cache, image_scoring=image_scoring,
+                                sizes=sizes, formats=formats, pdf_bundle=pdf_bundle,
+                                archive=archive)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        window = max(1, concurrency) * FETCH_QUEUE_PER_THREAD
+        for done, (url, future) in enumerate(_submit_windowed(executor, process, urls, window), 1):
+            try:
+                output_path = future.result()
+            except Exception as e:
+                print(f"Failed to generate preview for {url}: {e}")
+                output_path = None
+
+            if output_path:
+                succeeded.append(url)
+            else:
+                failed.append(url)
+            print(f"[{done}/{len(urls)}] {url}")
+
+    session.close()
+
+    print(f"Batch complete: {len(succeeded)} succeeded, {len(failed)} failed")
+    return succeeded, failed
+
+def _init_render_worker(font_dir, encoder_settings):
+    if font_dir:
+        configure_fonts(font_dir=font_dir)
+    configure_encoder(**encoder_settings)
+
+def _render_job(og_data, image, render_options, output_path, as_pdf=False, json_path=None):
+    """Render, encode and save one preview; runs in a pipeline render process."""
+    preview = create_link_preview(og_data, image=image, **render_options)
+    output_path = save_preview(preview, output_path, as_pdf=as_pdf)
+    if json_path:
+        export_og_json(og_data, json_path)
+    return output_path
+
+def _render_bundle_job(og_data, image, render_options):
+    """Render one preview and JPEG-encode it for a PdfBundle in the parent process."""
+    preview = create_link_preview(og_data, image=image, **render_options)
+    return encode_pdf_card(preview), preview.size
+
+def _render_outputs_job(og_data, image, render_options, output_dir, basename, sizes, formats,
+                        export_json=False):
+    """Render, encode and save every size and format of one preview in a render process."""
+    outputs = render_outputs(og_data, sizes, formats, image=image, **render_options)
+    return save_outputs(og_data, outputs, output_dir, basename, export_json=export_json)
+
+def _render_archive_job(og_data, image, render_options, output_filename=None, as_pdf=False,
+                        basename=None, sizes=None, formats=None):
+    """Render and encode one preview's files for an ArchiveSink in the parent process.
+
+    Returns a list of (filename, bytes): every size and format with sizes,
+    otherwise the one preview.
+    """
+    if sizes:
+        outputs = render_outputs(og_data, sizes, formats, image=image, **render_options)
+        return output_files(outputs, basename)
+
+    preview = create_link_preview(og_data, image=image, **render_options)
+    return [encode_batch_preview(preview, output_filename, as_pdf=as_pdf)]
+
+def run_pipeline(urls, output_dir, concurrency=DEFAULT_BATCH_CONCURRENCY, render_processes=0,
+                 use_og_size=False, use_circuit=False, accent_color=None, as_pdf=False,
+                 export_json=False, parser=None, http_cache=None, metadata_cache=None,
+                 image_cache=None, image_scoring=DEFAULT_IMAGE_SCORING, sizes=None, formats=None,
+                 pdf_bundle=None, archive=None):
+    """Generate previews with fetching and rendering in separate stages.
+
+    `concurrency` threads extract metadata and download images, and a pool of
+    `render_processes` worker processes (0 for one per CPU core) renders and
+    encodes, so rendering is no longer limited to one core by the GIL. URLs
+    are handed to the fetch threads a window at a time, and only
+    RENDER_QUEUE_PER_PROCESS fetched URLs per process may wait for rendering;
+    beyond that fetching pauses, keeping memory flat. Finished renders are
+    passed back to the calling thread, which appends them to pdf_bundle or
+    archive, so a slow write never holds up the render pool. Caches are used
+    by the fetch stage only. Returns (succeeded, failed).
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    render_processes = render_processes or os.cpu_count() or 1
+    if archive is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    used_names = set()
+    names_lock = threading.Lock()
+
+    session = create_http_session(pool_size=max(DEFAULT_POOL_SIZE, concurrency))
+
+    def fetch(url):
+        """Extract and prefetch one URL; returns (render job, finish) or None.
+
+        finish, if set, takes the job's result and writes it to the sink on
+        the calling thread, returning the output path.
+        """
+        og_data = extract_og_data(url, session=session, parser=parser, http_cache=http_cache,
+                                  metadata_cache=metadata_cache)
+        if not og_data:
+            print(f"Skipping {url}: no data extracted")
+            return None
+
+        image, image_size, scoring = prefetch_image(og_data, use_og_size=use_og_size,
+                                                    use_circuit=use_circuit,
+                                                    image_scoring=image_scoring,
+                                                    session=session, image_cache=image_cache,
+                                                    sizes=sizes)
+
+        render_options = dict(use_circuit=use_circuit, accent_color=accent_color,
+                              image_size=image_size, image_scoring=scoring)
+        if pdf_bundle is not None:
+            job = functools.partial(_render_bundle_job, og_data, image,
+                                    dict(render_options, use_og_size=use_og_size))
+            if export_json:
+                _export_bundle_json(og_data, output_dir, used_names, names_lock, archive=archive,
+                                    url=url)
+        elif sizes:
+            basename = _reserve_basename(og_data, used_names, names_lock)
+            json_filename = basename + '_og_data.json'
+            if archive is not None:
+                job = functools.partial(_render_archive_job, og_data, image, render_options,
+                                        basename=basename, sizes=sizes, formats=formats)
+            else:
+                job = functools.partial(_render_outputs_job, og_data, image, render_options,
+                                        output_dir, basename, sizes, formats,
+                                        export_json=export_json)
+        else:
+            output_filename = _reserve_filename(output_filename_for(og_data, as_pdf=as_pdf),
+                                                used_names, names_lock)
+            json_filename = output_filename.rsplit('.', 1)[0] + '_og_data.json'
+            if archive is not None:
+                job = functools.partial(_render_archive_job, og_data, image,
+                                        dict(render_options, use_og_size=use_og_size),
+                                        output_filename=output_filename, as_pdf=as_pdf)
+            else:
+                json_path = os.path.join(output_dir, json_filename) if export_json else None
+                job = functools.partial(_render_job, og_data, image,
+                                        dict(render_options, use_og_size=use_og_size),
+                                        os.path.join(output_dir, output_filename),
+                                        as_pdf=as_pdf, json_path=json_path)
+
+        if pdf_bundle is not None:
+            def finish(render):
+                # Appended as soon as it is rendered, so no finished card waits in memory
+                jpeg, size = render
+                pdf_bundle.add_image(jpeg, size, url=url)
+                return pdf_bundle.path
+        elif archive is not None:
+            def finish(files):
+                # Stored as soon as it is rendered, so no finished file waits in memory
+                paths = []
+                for filename, data in files:
+                    paths.append(write_output(data, output_dir, filename, archive=archive, url=url))
+                    print(f"Link preview saved to: {paths[-1]}")
+                if export_json:
+                    _export_json(og_data, output_dir, json_filename, archive=archive, url=url)
+                return paths if sizes else paths[0]
+        else:
+            finish = None
+        return job, finish
+
+    succeeded = []
+    failed = []
+
+    def record(url, output_path):
+        if output_path:
+            succeeded.append(url)
+        else:
+            failed.append(url)
+        print(f"[{len(succeeded) + len(failed)}/{len(urls)}] {url}")
+
+    # Finished fetches and renders in completion order, as (stage, url, future, finish)
+    finished = queue.Queue()
+    pending_urls = iter(urls)
+    fetched = collections.deque()   # (url, job, finish) waiting for a render slot
+    render_slots = render_processes * RENDER_QUEUE_PER_PROCESS
+    window = max(1, concurrency) + render_slots
+    fetching = rendering = 0
+
+    # Spawned rather than forked: the parent already runs threads holding locks
+    with ProcessPoolExecutor(max_workers=render_processes,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_render_worker,
+                             initargs=(get_font_registry().font_dir,
+                                       get_encoder().settings())) as render_pool, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as fetch_pool:
+
+        def schedule():
+            """Start renders while slots are free, then top up the fetch window."""
+            nonlocal fetching, rendering
+            while fetched and rendering < render_slots:
+                url, job, finish = fetched.popleft()
+                try:
+                    render = render_pool.submit(job)
+                except Exception as e:
+                    print(f"Failed to generate preview for {url}: {e}")
+                    record(url, None)
+                    continue
+                rendering += 1
+                # The callback only queues the render; the pool's result thread does no I/O
+                render.add_done_callback(
+                    lambda render, url=url, finish=finish: finished.put(('render', url, render, finish)))
+            for url in itertools.islice(pending_urls, window - fetching - len(fetched)):
+                fetching += 1
+                fetch_pool.submit(fetch, url).add_done_callback(
+                    lambda future, url=url: finished.put(('fetch', url, future, None)))
+
+        schedule()
+        while fetching or rendering:
+            stage, url, future, finish = finished.get()
+            try:
+                result = future.result()
+                if stage == 'render' and finish is not None:
+                    result = finish(result)
+            except Exception as e:
+                print(f"Failed to generate preview for {url}: {e}")
+                result = None
+
+            if stage == 'fetch':
+                fetching -= 1
+                if result is None:
+                    record(url, None)
+                else:
+                    fetched.append((url, *result))
+            else:
+                rendering -= 1
+                record(url, result)
+            schedule()
+
+    session.close()
+
+    print(f"Batch complete: {len(succeeded)} succeeded, {len(failed)} failed")
+    return succeeded, failed
+
+async def process_url_async(url, output_dir, session, executor, semaphore, use_og_size=False,
+                            use_circuit=False, accent_color=None, as_pdf=False,
+                            export_json=False, used_names=None, names_lock=None, parser=None,
+                            http_cache=None, metadata_cache=None, image_cache=None,
+                            image_scoring=DEFAULT_IMAGE_SCORING, sizes=None, formats=None,
+                            pdf_bundle=None, archive=None):
+    """Async counterpart of process_url(): network I/O on the loop; caches and rendering in executor."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+
+    async with semaphore:
+        og_data = await extract_og_data_async(url, session, executor=executor, parser=parser,
+                                              http_cache=http_cache, metadata_cache=metadata_cache)
+        if not og_data:
+            print(f"Skipping {url}: no data extracted")
+            return None
+
+        # Only download the image if a chosen layout is going to show it
+        layout_sizes = sizes or ['og' if use_og_size else 'compact']
+        image_url = og_data.get('image')
+        image_size = None
+        if image_url and use_circuit and 'compact' in layout_sizes and image_scoring == 'size':
+            image_size = declared_image_size(og_data)
+            if image_size is None:
+                try:
+                    image_size = await probe_image_size_async(image_url, session,
+                                                              image_cache=image_cache,
+                                                              executor=executor)
+                except Exception as e:
+                    print(f"Could not probe image {image_url}: {e}")
+            if image_size is None:
+                # Scored by URL, as the sync path does, rather than probing again in the renderer
+                image_scoring = 'url'
+        image = None
+        if images_needed(og_data, layout_sizes, use_circuit=use_circuit, image_size=image_size):
+            image_data = None
+            if image_cache:
+                image_data = await loop.run_in_executor(executor, image_cache.get, image_url)
+            try:
+                if image_data is None:
+                    image_data = await fetch_image_data_async(image_url, session)
+                    if image_cache:
+                        await loop.run_in_executor(executor, image_cache.put, image_url, image_data)
+                image = ResolvedImage(image_url, data=image_data)
+            except Exception as e:
+                print(f"Could not download image {image_url}: {e}")
+                image = ResolvedImage(image_url, error=e)
+
+    if sizes:
+        render = functools.partial(render_outputs, og_data, sizes, formats, use_circuit=use_circuit,
+                                   accent_color=accent_color, image=image, image_cache=image_cache,
+                                   image_size=image_size, image_scoring=image_scoring)
+        outputs = await loop.run_in_executor(executor, render)
+        basename = _reserve_basename(og_data, used_names, names_lock)
+        save = functools.partial(save_outputs, og_data, outputs, output_dir, basename,
+                                 export_json=export_json, archive=archive, url=url)
+        return await loop.run_in_executor(executor, save)
+
+    render = functools.partial(create_link_preview, og_data, use_og_size=use_og_size,
+                               use_circuit=use_circuit, accent_color=accent_color,
+                               image=image, image_cache=image_cache, image_size=image_size,
+                               image_scoring=image_scoring)
+    preview = await loop.run_in_executor(executor, render)
+
+    if pdf_bundle is not None:
+        add = functools.partial(add_to_bundle, pdf_bundle, url, og_data, preview, output_dir,
+                                export_json=export_json, used_names=used_names,
+                                names_lock=names_lock, archive=archive)
+        return await loop.run_in_executor(executor, add)
+
+    save = functools.partial(save_batch_outputs, og_data, preview, output_dir, as_pdf=as_pdf,
+                             export_json=export_json, used_names=used_names,
+                             names_lock=names_lock, archive=archive, url=url)
+    return await loop.run_in_executor(executor, save)
+
+async def _run_batch_async(urls, output_dir, concurrency, **options):
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    used_names = set()
+    names_lock = threading.Lock()
+
+    succeeded = []
+    failed = []
+
+    async def run_one(url):
+        try:
+            output_path = await process_url_async(url, output_dir, session, executor, semaphore,
+                                                  used_names=used_names, names_lock=names_lock,
+                                                  **options)
+        except Exception as e:
+            print(f"Failed to generate preview for {url}: {e}")
+            output_path = None
+
+        if output_path:
+            succeeded.append(url)
+        else:
+            failed.append(url)
+        print(f"[{len(succeeded) + len(failed)}/{len(urls)}] {url}")
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as executor:
+        session = create_async_http_session(pool_size=max(DEFAULT_POOL_SIZE, concurrency))
+        async with session:
+            await asyncio.gather(*(run_one(url) for url in urls))
+
+    return succeeded, failed
+
+def run_batch_async(urls, output_dir, concurrency=DEFAULT_BATCH_CONCURRENCY, use_og_size=False,
+                    use_circuit=False, accent_color=None, as_pdf=False, export_json=False, parser=None,
+                    http_cache=None, metadata_cache=None, image_cache=None,
+                    image_scoring=DEFAULT_IMAGE_SCORING, sizes=None, formats=None, pdf_bundle=None,
+                    archive=None):
+    """Generate previews for many URLs on a single asyncio event loop.
+
+    Up to `concurrency` URLs are in flight at once; rendering and saving are
+    handed to a thread pool sized to the CPU count. Returns (succeeded, failed).
+    """
+    import asyncio
+
+    if not AIOHTTP_AVAILABLE:
+        raise RuntimeError("aiohttp not available. Install with: pip install aiohttp")
+
+    if archive is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    succeeded, failed = asyncio.run(_run_batch_async(
+        urls, output_dir, concurrency, use_og_size=use_og_size, use_circuit=use_circuit,
+        accent_color=accent_color, as_pdf=as_pdf, export_json=export_json, parser=parser,
+        http_cache=http_cache, metadata_cache=metadata_cache, image_cache=image_cache,
+        image_scoring=image_scoring, sizes=sizes, formats=formats, pdf_bundle=pdf_bundle,
+        archive=archive))
+
+    print(f"Batch complete: {len(succeeded)} succeeded, {len(failed)} failed")
+    return succeeded, failed
+
+def open_caches(cache_dir, cache_ttl=DEFAULT_METADATA_TTL, image_cache_size=DEFAULT_IMAGE_CACHE_SIZE,
+                http_cache_size=DEFAULT_HTTP_CACHE_SIZE, negative_cache_ttl=DEFAULT_NEGATIVE_TTL,
+                cache_variants=False):
+    """Open the (http, metadata, image) caches under cache_dir.
+
+    image_cache_size and http_cache_size are in bytes; with 0 that cache is
+    None. cache_variants also keeps resized images in the image cache.
+    """
+    http_cache = None
+    if http_cache_size > 0:
+        http_cache = HttpCache(os.path.join(cache_dir, 'http'), max_bytes=http_cache_size)
+    metadata_cache = MetadataCache(os.path.join(cache_dir, 'metadata.sqlite3'), ttl=cache_ttl,
+                                   negative_ttl=negative_cache_ttl)
+    image_cache = None
+    if image_cache_size > 0:
+        image_cache = ImageCache(os.path.join(cache_dir, 'images'), max_bytes=image_cache_size,
+                                 store_variants=cache_variants)
+    return http_cache, metadata_cache, image_cache
+
+def _open_caches(args):
+    """Open the caches under --cache-dir, the size-capped ones even when disabled so they can be purged."""
+    _, metadata_cache, _ = open_caches(args.cache_dir, cache_ttl=args.cache_ttl, image_cache_size=0,
+                                       http_cache_size=0, negative_cache_ttl=args.negative_cache_ttl)
+    http_cache = HttpCache(os.path.join(args.cache_dir, 'http'),
+                           max_bytes=args.http_cache_size * 1024 * 1024)
+    image_cache = ImageCache(os.path.join(args.cache_dir, 'images'),
+                             max_bytes=args.image_cache_size * 1024 * 1024,
+                             store_variants=args.cache_variants)
+    return http_cache, metadata_cache, image_cache
+
+class RenderedPreview:
+    """Result of LinkPreviewer.render().
+
+    image is the Pillow image (None for SVG), data the encoded bytes (None
+    when written to a caller's file object), metadata the extracted og_data
+    dict.
+    """
+
+    def __init__(self, image, data, format, metadata):
+        self.image = image
+        self.data = data
+        self.format = format
+        self.metadata = metadata
+
+    @property
+    def content_type(self):
+        return PREVIEW_CONTENT_TYPES[self.format]
+
+class LinkPreviewer:
+    """Library entry point: extract metadata and render previews in memory.
+
+    Holds the rendering defaults, a pooled HTTP session and optional caches,
+    so one instance can be shared by many threads and requests. Nothing is
+    written to disk unless caches are given (or cache_dir is set).
+
+        with LinkPreviewer(use_og_size=True) as previewer:
+            result = previewer.render('https://example.com')
+            result.data          # PNG bytes
+            result.metadata      # og_data dict
+
+    Fonts, encoder settings and the Playwright browser are process-wide; see
+    configure_fonts(), configure_encoder() and configure_browser_pool().
+    """
+
+    def __init__(self, use_og_size=False, use_circuit=False, accent_color=None, format='png',
+                 parser=None, image_scoring=DEFAULT_IMAGE_SCORING, session=None,
+                 pool_size=DEFAULT_POOL_SIZE, cache_dir=None, cache_ttl=DEFAULT_METADATA_TTL,
+                 negative_cache_ttl=DEFAULT_NEGATIVE_TTL, image_cache_size=DEFAULT_IMAGE_CACHE_SIZE,
+                 http_cache_size=DEFAULT_HTTP_CACHE_SIZE, cache_variants=False, http_cache=None,
+                 metadata_cache=None, image_cache=None):
+        if format not in PREVIEW_CONTENT_TYPES:
+            raise ValueError(f"Unknown format '{format}', choose from: {', '.join(PREVIEW_CONTENT_TYPES)}")
+
+        self.use_og_size = use_og_size
+        self.use_circuit = use_circuit
+        self.accent_color = accent_color
+        self.format = format
+        self.parser = parser
+        self.image_scoring = image_scoring
+
+        self._owns_session = session is None
+        self.session = session or create_http_session(pool_size=pool_size)
+
+        self._owned_caches = []
+        if cache_dir and not (http_cache or metadata_cache or image_cache):
+            http_cache, metadata_cache, image_cache = open_caches(
+                cache_dir, cache_ttl=cache_ttl, image_cache_size=image_cache_size,
+                http_cache_size=http_cache_size, negative_cache_ttl=negative_cache_ttl,
+                cache_variants=cache_variants)
+            self._owned_caches = [cache for cache in (metadata_cache, image_cache) if cache]
+        self.http_cache = http_cache
+        self.metadata_cache = metadata_cache
+        self.image_cache = image_cache
+
+    def extract(self, url):
+        """Return the og_data dict for url, or None if nothing could be extracted."""
+        return extract_og_data(url, session=self.session, parser=self.parser,
+                               http_cache=self.http_cache, metadata_cache=self.metadata_cache)
+
+    def render(self, url=None, output=None, format=None, og_data=None, use_og_size=None,
+               use_circuit=None, accent_color=None, image_scoring=None):
+        """Render the preview of url (or of given og_data) without touching disk.
+
+        Options default to the ones the previewer was created with. With
+        output, a binary file object, the encoded preview is written there
+        and RenderedPreview.data is None. Returns None if no metadata could
+        be extracted.
+        """
+        format = format or self.format
+        if format not in PREVIEW_CONTENT_TYPES:
+            raise ValueError(f"Unknown format '{format}', choose from: {', '.join(PREVIEW_CONTENT_TYPES)}")
+
+        og_data = og_data or self.extract(url)
+        if not og_data:
+            return None
+
+        render = create_svg_preview if format in VECTOR_FORMATS else create_link_preview
+        preview = render(
+            og_data,
+            use_og_size=self.use_og_size if use_og_size is None else use_og_size,
+            use_circuit=self.use_circuit if use_circuit is None else use_circuit,
+            accent_color=accent_color or self.accent_color,
+            session=self.session, image_cache=self.image_cache,
+            image_scoring=image_scoring or self.image_scoring)
+
+        if format in VECTOR_FORMATS:
+            # Markup rather than an image; nothing to encode
+            data = preview.encode('utf-8')
+            preview = None
+            if output is not None:
+                output.write(data)
+                data = None
+        elif output is not None:
+            write_preview(preview, output, format)
+            data = None
+        else:
+            data = encode_preview(preview, format)
+
+        return RenderedPreview(preview, data, format, og_data)
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+        for cache in self._owned_caches:
+            cache.close()
+        self._owned_caches = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _flag(params, name):
+    return params.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+class PreviewServer(ThreadingHTTPServer):
+    """HTTP service that renders previews with warm sessions, fonts, browser and caches.
+
+    Requests are served by a shared LinkPreviewer, each in its own thread;
+    at most `workers` of them extract and render at once, the rest wait
+    their turn.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, previewer, workers=DEFAULT_BATCH_CONCURRENCY):
+        super().__init__(address, PreviewRequestHandler)
+        self.previewer = previewer
+        self.render_slots = threading.BoundedSemaphore(max(1, workers))
+
+    def render(self, url, output_format='png', **options):
+        """Return (content_type, body) for url, or None if no data could be extracted."""
+        with self.render_slots:
+            if output_format == 'json':
+                og_data = self.previewer.extract(url)
+                if not og_data:
+                    return None
+                body = json.dumps(og_json_data(og_data), indent=2, ensure_ascii=False)
+                return 'application/json', body.encode('utf-8')
+
+            result = self.previewer.render(url, format=output_format, **options)
+            if result is None:
+                return None
+            return result.content_type, result.data
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+    """GET /preview?url=...&format=png|pdf|webp|jpeg|avif|svg|json&og_size=1&circuit=1&color=...; GET /health."""
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, 'application/json', json.dumps({'error': message}).encode('utf-8'))
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/health':
+            self._send(200, 'application/json', b'{"status": "ok"}')
+            return
+        if parsed.path != '/preview':
+            self._send_error(404, f'Unknown path: {parsed.path}')
+            return
+
+        params = dict(parse_qsl(parsed.query))
+        url = params.get('url')
+        if not url:
+            self._send_error(400, 'Missing url parameter')
+            return
+
+        output_format = params.get('format', 'png').lower()
+        if output_format not in SERVE_FORMATS:
+            self._send_error(400, f"format must be one of: {', '.join(SERVE_FORMATS)}")
+            return
+
+        accent_color = None
+        if params.get('color'):
+            accent_color = parse_color(params['color'])
+            if accent_color is None:
+                self._send_error(400, f"Invalid color: {params['color']}")
+                return
+
+        image_scoring = params.get('image_scoring')
+        if image_scoring and image_scoring not in IMAGE_SCORING_MODES:
+            self._send_error(400, f"image_scoring must be one of: {', '.join(IMAGE_SCORING_MODES)}")
+            return
+
+        try:
+            result = self.server.render(url, output_format=output_format,
+                                        use_og_size=_flag(params, 'og_size'),
+                                        use_circuit=_flag(params, 'circuit'),
+                                        accent_color=accent_color, image_scoring=image_scoring)
+        except Exception as e:
+            print(f"Failed to generate preview for {url}: {e}")
+            self._send_error(500, f'Failed to generate preview: {e}')
+            return
+
+        if result is None:
+            self._send_error(422, f'No data extracted from {url}')
+            return
+
+        self._send(200, *result)
+
+def _add_runtime_arguments(parser):
+    """Options shared by one-off runs and `linkpreview serve`: parsing, caches, fonts, encoders, browser."""
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default=DEFAULT_PARSER,
+                       help=f"HTML parser backend; 'scan' is a regex meta tag scanner (default: {DEFAULT_PARSER})")
+    parser.add_argument('--cache-dir', type=str, default=DEFAULT_CACHE_DIR,
+                       help='Directory for persistent caches (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Bypass all persistent caches')
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_METADATA_TTL,
+                       help='Seconds extracted metadata stays cached, 0 to disable (default: %(default)s)')
+    parser.add_argument('--negative-cache-ttl', type=int, default=DEFAULT_NEGATIVE_TTL,
+                       help='Seconds a URL that is gone (404/410) or whose host does not exist stays cached '
+                            'as a failure, 0 to disable (default: %(default)s)')
+    parser.add_argument('--image-cache-size', type=int, default=DEFAULT_IMAGE_CACHE_SIZE // (1024 * 1024),
+                       help='Image cache budget in MB, 0 to disable (default: %(default)s)')
+    parser.add_argument('--cache-variants', action='store_true',
+                       help='Also keep images resized for a card layout in the image cache')
+    parser.add_argument('--http-cache-size', type=int, default=DEFAULT_HTTP_CACHE_SIZE // (1024 * 1024),
+                       help='Budget in MB of the HTTP cache of page heads, 0 to disable (default: %(default)s)')
+    parser.add_argument('--image-scoring', choices=IMAGE_SCORING_MODES, default=DEFAULT_IMAGE_SCORING,
+                       help="Pick the image-only layout from the image's probed size or from its URL alone "
+                            "(default: %(default)s)")
+    parser.add_argument('--font-dir', type=str, default=None,
+                       help='Directory of .ttf/.otf fonts tried before the system fonts '
+                            '(files with "bold" in the name are used for bold text)')
+    parser.add_argument('--effort', choices=ENCODER_EFFORTS, default=DEFAULT_ENCODER_EFFORT,
+                       help='Trade encode CPU for smaller files (default: %(default)s)')
+    parser.add_argument('--quality', type=int, default=None, metavar='Q',
+                       help='Quality (1-100) of WebP, JPEG, AVIF and PDF output (default: per format)')
+    parser.add_argument('--png-compression', type=int, default=None, metavar='LEVEL',
+                       help='PNG zlib level, 0 (fastest) to 9 (smallest) (default: per --effort)')
+    parser.add_argument('--svg-images', choices=SVG_IMAGE_MODES, default=DEFAULT_SVG_IMAGES,
+                       help='Embed og:image in SVG output as a data URI, or link it by URL (default: %(default)s)')
+    parser.add_argument('--browser-pages', type=int, default=DEFAULT_BROWSER_MAX_PAGES,
+                       help=f'Max pages rendered at once by the Playwright fallback (default: {DEFAULT_BROWSER_MAX_PAGES})')
+    parser.add_argument('--browser-recycle', type=int, default=DEFAULT_BROWSER_RECYCLE_AFTER,
+                       help=f'Relaunch the Playwright browser after this many pages (default: {DEFAULT_BROWSER_RECYCLE_AFTER})')
+    parser.add_argument('--browser-wait-tags', type=str, default=','.join(DEFAULT_BROWSER_WAIT_TAGS),
+                       help="Comma-separated meta tags the Playwright fallback waits for before reading the page; "
+                            "empty for a fixed 1s wait (default: %(default)s)")
+    parser.add_argument('--browser-load-all', action='store_true',
+                       help='Let the Playwright fallback load images, fonts, stylesheets and third-party scripts')
+
+def _configure_runtime(args):
+    """Apply the font, encoder and browser options from _add_runtime_arguments()."""
+    if args.font_dir:
+        configure_fonts(font_dir=args.font_dir)
+
+    configure_encoder(effort=args.effort, quality=args.quality, png_compression=args.png_compression,
+                      svg_images=args.svg_images)
+
+    # The browser itself only launches if the Playwright fallback fires
+    wait_tags = [tag.strip() for tag in args.browser_wait_tags.split(',') if tag.strip()]
+    configure_browser_pool(max_pages=args.browser_pages, recycle_after=args.browser_recycle,
+                           block_resources=not args.browser_load_all, wait_for_tags=wait_tags)
+
+def serve_main(argv=None):
+    """Entry point of `linkpreview serve`."""
+    parser = argparse.ArgumentParser(
+        prog='linkpreview serve',
+        description='Serve link previews over HTTP with warm caches',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Endpoints:
+  GET /preview?url=URL[&format=png|pdf|webp|jpeg|avif|svg|json][&og_size=1][&circuit=1][&color=R,G,B]
+  GET /health
+        """
+    )
+    parser.add_argument('--host', type=str, default=DEFAULT_SERVE_HOST,
+                       help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT,
+                       help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                       help='Max previews extracted and rendered at once (default: %(default)s)')
+    _add_runtime_arguments(parser)
+
+    args = parser.parse_args(argv)
+    try:
+        _configure_runtime(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # One connection per worker per host, and the caches unless --no-cache
+    previewer = LinkPreviewer(parser=args.parser, image_scoring=args.image_scoring,
+                              pool_size=max(DEFAULT_POOL_SIZE, args.workers),
+                              cache_dir=None if args.no_cache else args.cache_dir,
+                              cache_ttl=args.cache_ttl,
+                              negative_cache_ttl=args.negative_cache_ttl,
+                              image_cache_size=args.image_cache_size * 1024 * 1024,
+                              http_cache_size=args.http_cache_size * 1024 * 1024,
+                              cache_variants=args.cache_variants)
+    server = PreviewServer((args.host, args.port), previewer, workers=args.workers)
+    print(f"Serving link previews on http://{args.host}:{server.server_port}/preview?url=...")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+        previewer.close()
+
+    return 0
+
 def main():
+    # `linkpreview serve ...` runs the HTTP service instead of a one-off preview
+    if sys.argv[1:2] == ['serve']:
+        return serve_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description='Generate link preview from URL',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -954,9 +4294,16 @@ Examples:
   %(prog)s https://example.com --circuit --color "#00948F"
   %(prog)s https://example.com --json
   %(prog)s https://example.com --og-size --circuit --json
+  %(prog)s https://example.com --sizes compact,og --formats png,webp,pdf
+  %(prog)s --batch urls.txt --output-dir ./out --concurrency 16
+  %(prog)s --batch urls.txt --pdf-bundle digest.pdf --cards-per-page 4
+  %(prog)s --batch urls.txt --archive previews.tar --json
+  cat urls.txt | %(prog)s --batch - --output-dir ./out
+  %(prog)s serve --port 8080
         """
     )
-    parser.add_argument('url', help='URL to generate preview for')
+    parser.add_argument('url', nargs='?', default=None,
+                       help='URL to generate preview for')
     parser.add_argument('output', nargs='?', default=None,
                        help='Output filename (optional - will auto-generate from title)')
     parser.add_argument('--manual', '-m', action='store_true',
@@ -971,20 +4318,165 @@ Examples:
                        help='Accent color for circuit pattern (hex: #RRGGBB or rgb: r,g,b)')
     parser.add_argument('--json', action='store_true',
                        help='Export structured Open Graph data as JSON file')
+    parser.add_argument('--sizes', type=str, default=None, metavar='LIST',
+                       help=f"Render several sizes from one fetch, comma-separated from: {', '.join(OUTPUT_SIZES)}")
+    parser.add_argument('--formats', type=str, default=None, metavar='LIST',
+                       help=f"Encode each size in several formats, comma-separated from: {', '.join(OUTPUT_FORMATS)}")
     parser.add_argument('--output-dir', type=str, default=None,
                        help='Output directory (default: current directory or ~/Desktop on macOS)')
+    parser.add_argument('--batch', type=str, default=None, metavar='FILE',
+                       help="Generate previews for every URL in FILE (one per line, '-' for stdin)")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_BATCH_CONCURRENCY,
+                       help=f'Number of URLs fetched in parallel in batch mode (default: {DEFAULT_BATCH_CONCURRENCY})')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                       help='Use the asyncio fetch engine in batch mode (requires aiohttp)')
+    parser.add_argument('--pipeline', action='store_true',
+                       help='In batch mode, fetch in threads and render/encode in a pool of worker processes')
+    parser.add_argument('--render-processes', type=int, default=0, metavar='N',
+                       help='Number of render processes in --pipeline mode (default: one per CPU core)')
+    parser.add_argument('--pdf-bundle', type=str, default=None, metavar='FILE',
+                       help='In batch mode, write all previews as pages of one PDF instead of separate files')
+    parser.add_argument('--cards-per-page', type=int, default=1, metavar='N',
+                       help='Previews per --pdf-bundle page; above 1 they are stacked on --page-size sheets (default: 1)')
+    parser.add_argument('--page-size', choices=PDF_PAGE_SIZES, default=DEFAULT_PDF_PAGE_SIZE,
+                       help='Sheet size of --pdf-bundle pages holding several previews (default: %(default)s)')
+    parser.add_argument('--archive', type=str, default=None, metavar='FILE',
+                       help='In batch mode, stream all output files into one .zip, .tar, .tar.gz or .tgz archive with a manifest.json instead of --output-dir')
+    _add_runtime_arguments(parser)
+    parser.add_argument('--purge-cache', action='store_true',
+                       help='Empty the persistent caches before running (or just purge if no URL is given)')
 
     args = parser.parse_args()
 
     # Parse accent color if provided
     accent_color = parse_color(args.color) if args.color else None
 
+    # Multi-output mode; a missing list falls back to --og-size / --pdf
+    sizes = None
+    formats = None
+    if args.sizes or args.formats:
+        try:
+            sizes = (parse_output_list(args.sizes, OUTPUT_SIZES) if args.sizes
+                     else ['og' if args.og_size else 'compact'])
+            formats = (parse_output_list(args.formats, OUTPUT_FORMATS) if args.formats
+                       else ['pdf' if args.pdf else 'png'])
+        except ValueError as e:
+            parser.error(str(e))
+        if 'avif' in formats and not avif_available():
+            parser.error('AVIF output needs Pillow >= 11.2 or: pip install pillow-avif-plugin')
+
+    try:
+        _configure_runtime(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    http_cache = None
+    metadata_cache = None
+    image_cache = None
+    if not args.no_cache or args.purge_cache:
+        http_cache, metadata_cache, image_cache = _open_caches(args)
+
+    if args.purge_cache:
+        http_cache.purge()
+        metadata_cache.purge()
+        image_cache.purge()
+        print(f"Purged caches in {args.cache_dir}")
+        if not args.url and not args.batch:
+            return 0
+
+    if args.no_cache:
+        http_cache = None
+        metadata_cache = None
+        image_cache = None
+    else:
+        if args.http_cache_size <= 0:
+            http_cache = None
+        if args.image_cache_size <= 0:
+            image_cache = None
+
+    if args.use_async and not args.batch:
+        parser.error('--async is only supported with --batch')
+
+    if args.pipeline and not args.batch:
+        parser.error('--pipeline is only supported with --batch')
+
+    if args.pipeline and args.use_async:
+        parser.error('--pipeline cannot be combined with --async')
+
+    if args.pdf_bundle and not args.batch:
+        parser.error('--pdf-bundle is only supported with --batch')
+
+    if args.pdf_bundle and sizes:
+        parser.error('--pdf-bundle cannot be combined with --sizes or --formats')
+
+    if args.cards_per_page < 1:
+        parser.error('--cards-per-page must be at least 1')
+
+    if args.archive:
+        if not args.batch:
+            parser.error('--archive is only supported with --batch')
+        try:
+            archive_format_for(args.archive)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.batch:
+        if args.url or args.output or args.manual:
+            parser.error('--batch cannot be combined with url, output or --manual')
+
+        if args.use_async and not AIOHTTP_AVAILABLE:
+            parser.error('--async requires aiohttp. Install with: pip install aiohttp')
+
+        urls = read_url_list(args.batch)
+        print(f"Batch mode: {len(urls)} URLs, concurrency {args.concurrency}")
+        pdf_bundle = None
+        if args.pdf_bundle:
+            os.makedirs(os.path.dirname(os.path.abspath(args.pdf_bundle)), exist_ok=True)
+            pdf_bundle = PdfBundle(args.pdf_bundle, cards_per_page=args.cards_per_page,
+                                   page_size=args.page_size, order=urls)
+        archive = None
+        if args.archive:
+            os.makedirs(os.path.dirname(os.path.abspath(args.archive)), exist_ok=True)
+            archive = ArchiveSink(args.archive)
+        if args.pipeline:
+            batch_runner = functools.partial(run_pipeline, render_processes=args.render_processes)
+        elif args.use_async:
+            batch_runner = run_batch_async
+        else:
+            batch_runner = run_batch
+        try:
+            succeeded, failed = batch_runner(urls, resolve_output_dir(args.output_dir),
+                                             concurrency=args.concurrency,
+                                             use_og_size=args.og_size, use_circuit=args.circuit,
+                                             accent_color=accent_color, as_pdf=args.pdf,
+                                             export_json=args.json, parser=args.parser,
+                                             http_cache=http_cache, metadata_cache=metadata_cache,
+                                             image_cache=image_cache,
+                                             image_scoring=args.image_scoring,
+                                             sizes=sizes, formats=formats, pdf_bundle=pdf_bundle,
+                                             archive=archive)
+        finally:
+            if pdf_bundle is not None:
+                pages = pdf_bundle.close()
+                if pages:
+                    print(f"PDF bundle of {pages} pages saved to: {pdf_bundle.path}")
+                else:
+                    print(f"Warning: No previews rendered, PDF bundle not written: {pdf_bundle.path}")
+            if archive is not None:
+                files = archive.close()
+                print(f"Archive of {files} files saved to: {archive.path}")
+        return 0 if not failed else 1
+
+    if not args.url:
+        parser.error('a URL is required unless --batch is used')
+
     if args.manual:
         print("Manual mode: Please provide the metadata manually")
         og_data = get_manual_og_data(args.url)
     else:
         print(f"Extracting Open Graph data from: {args.url}")
-        og_data = extract_og_data(args.url)
+        og_data = extract_og_data(args.url, parser=args.parser, http_cache=http_cache,
+                                  metadata_cache=metadata_cache)
 
         if not og_data:
             print("\nAutomatic extraction failed. Would you like to enter the data manually?")
@@ -1018,45 +4510,28 @@ Examples:
     print(f"Found: {og_data['title']}")
     print(f"Generating link preview...")
 
-    # Determine output directory
-    if args.output_dir:
-        output_dir = args.output_dir
-    elif os.path.exists('/Users'):
-        # macOS - use Desktop
-        output_dir = os.path.expanduser('~/Desktop')
-    else:
-        # Linux/other - use current directory
-        output_dir = os.getcwd()
+    output_dir = resolve_output_dir(args.output_dir)
+
+    if sizes:
+        # Every size and format from this one extraction and image download
+        image, image_size, image_scoring = prefetch_image(og_data, use_circuit=args.circuit,
+                                                          image_scoring=args.image_scoring,
+                                                          image_cache=image_cache, sizes=sizes)
+        outputs = render_outputs(og_data, sizes, formats, image=image, use_circuit=args.circuit,
+                                 accent_color=accent_color, image_cache=image_cache,
+                                 image_size=image_size, image_scoring=image_scoring)
+        save_outputs(og_data, outputs, output_dir, output_basename_for(og_data, args.output),
+                     export_json=args.json)
+        return 0
 
     # Create preview
     preview = create_link_preview(og_data, use_og_size=args.og_size,
-                                  use_circuit=args.circuit, accent_color=accent_color)
-
-    # Generate filename from title if not provided
-    if args.output:
-        output_filename = args.output
-        # Ensure correct extension for PDF mode
-        if args.pdf and not output_filename.lower().endswith('.pdf'):
-            output_filename = output_filename.rsplit('.', 1)[0] + '.pdf'
-        elif not args.pdf and not output_filename.lower().endswith('.png'):
-            output_filename = output_filename.rsplit('.', 1)[0] + '.png'
-    else:
-        output_filename = sanitize_filename(og_data['title'], as_pdf=args.pdf)
+                                  use_circuit=args.circuit, accent_color=accent_color,
+                                  image_cache=image_cache, image_scoring=args.image_scoring)
 
+    output_filename = output_filename_for(og_data, args.output, as_pdf=args.pdf)
     output_path = os.path.join(output_dir, output_filename)
-
-    # Save as PDF or PNG
-    if args.pdf:
-        if save_as_pdf(preview, output_path):
-            print(f"Link preview PDF saved to: {output_path}")
-        else:
-            # Fallback to PNG if PDF fails
-            png_path = output_path.replace('.pdf', '.png')
-            preview.save(png_path)
-            print(f"PDF export failed, saved PNG to: {png_path}")
-    else:
-        preview.save(output_path)
-        print(f"Link preview saved to: {output_path}")
+    save_preview(preview, output_path, as_pdf=args.pdf)
 
     # Export JSON if requested
     if args.json:
@@ -53,7 +53,10 @@ setup(
             "black",
             "isort",
             "flake8",
-        ]
+        ],
+        "async": [
+            "aiohttp>=3.8",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -0,0 +1,25 @@
+import pytest
+
+from linkpreview_cli import _site_of
+
+
+@pytest.mark.parametrize('host, site', [
+    ('www.example.com', 'example.com'),
+    ('cdn.static.example.com', 'example.com'),
+    ('www.bbc.co.uk', 'bbc.co.uk'),
+    ('tracker.co.uk', 'tracker.co.uk'),
+    ('news.example.com.au', 'example.com.au'),
+    ('someone.github.io', 'someone.github.io'),
+    ('Example.COM.', 'example.com'),
+    ('127.0.0.1', '127.0.0.1'),
+    ('::1', '::1'),
+    (None, ''),
+])
+def test_site_of(host, site):
+    assert _site_of(host) == site
+
+
+def test_public_suffix_siblings_are_third_parties():
+    assert _site_of('www.bbc.co.uk') != _site_of('tracker.co.uk')
+    assert _site_of('static.files.bbci.co.uk') != _site_of('www.bbc.co.uk')
+    assert _site_of('static.bbc.co.uk') == _site_of('www.bbc.co.uk')
@@ -0,0 +1,147 @@
+import asyncio
+import http.server
+import threading
+import time
+
+import pytest
+import requests
+
+import linkpreview_cli
+from linkpreview_cli import HttpCache, create_async_http_session, extract_og_data, extract_og_data_async
+
+
+def page(title):
+    return f"<html><head><title>{title}</title></head><body></body></html>".encode()
+
+
+class Site:
+    """A local origin whose /short redirect can be pointed elsewhere between fetches."""
+
+    def __init__(self):
+        self.redirect = '/old'
+        self.requested = []
+        self.pages = {
+            '/old': ({'ETag': '"v1"', 'Cache-Control': 'max-age=0'}, page('Old page')),
+            '/new': ({}, page('New page')),
+            # Answers any validators with 304, even ones meant for another URL
+            '/lenient': ({'ETag': '"v2"', 'Cache-Control': 'max-age=0'}, page('Lenient page')),
+        }
+
+        site = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requested.append(self.path)
+                if self.path == '/short':
+                    self.send_response(302)
+                    self.send_header('Location', site.redirect)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if self.path not in site.pages:
+                    self.send_error(404)
+                    return
+
+                headers, body = site.pages[self.path]
+                validator = self.headers.get('If-None-Match')
+                if validator and (validator == headers.get('ETag') or self.path == '/lenient'):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_HEAD = do_GET
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site(monkeypatch):
+    monkeypatch.setattr(linkpreview_cli, 'PLAYWRIGHT_AVAILABLE', False)
+    site = Site()
+    yield site
+    site.close()
+
+
+def extract(url, http_cache, use_async):
+    if not use_async:
+        with requests.Session() as session:
+            return extract_og_data(url, session=session, http_cache=http_cache)
+
+    async def run():
+        async with create_async_http_session() as session:
+            return await extract_og_data_async(url, session, http_cache=http_cache)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+@pytest.mark.parametrize('target, title', [('/new', 'New page'), ('/lenient', 'Lenient page')])
+def test_stale_entry_follows_a_changed_redirect(site, tmp_path, use_async, target, title):
+    http_cache = HttpCache(str(tmp_path))
+    short = site.url + '/short'
+
+    assert extract(short, http_cache, use_async)['title'] == 'Old page'
+    assert http_cache.lookup(short)['url'] == site.url + '/old'
+
+    site.redirect = target
+    site.requested.clear()
+    assert extract(short, http_cache, use_async)['title'] == title
+    # Revalidation asks for the requested URL, never the old redirect target
+    assert site.requested[0] == '/short'
+    assert '/old' not in site.requested
+
+    entry = http_cache.lookup(short)
+    assert entry is None or entry['url'] == site.url + target
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_gone_redirect_target_drops_the_alias(site, tmp_path, use_async):
+    http_cache = HttpCache(str(tmp_path))
+    short = site.url + '/short'
+    extract(short, http_cache, use_async)
+
+    site.redirect = '/gone'
+    assert extract(short, http_cache, use_async) is None
+    assert http_cache.lookup(short) is None
+
+    site.redirect = '/old'
+    assert extract(short, http_cache, use_async)['title'] == 'Old page'
+
+
+def test_least_recently_used_pages_are_pruned(tmp_path):
+    http_cache = HttpCache(str(tmp_path), max_bytes=3000)
+    headers = {'etag': '"v1"', 'content-type': 'text/html'}
+    for name in ('a', 'b'):
+        http_cache.store(f'https://{name}.example/', f'https://{name}.example/', headers, b'x' * 1000)
+        time.sleep(0.01)
+    # A hit counts as a use
+    assert http_cache.lookup('https://a.example/') is not None
+    time.sleep(0.01)
+
+    http_cache.store('https://c.example/', 'https://c.example/', headers, b'x' * 1000)
+
+    assert http_cache.lookup('https://a.example/') is not None
+    assert http_cache.lookup('https://b.example/') is None
+    assert http_cache.lookup('https://c.example/') is not None
+
+
+def test_bodies_over_the_budget_are_not_stored(tmp_path):
+    http_cache = HttpCache(str(tmp_path), max_bytes=500)
+    http_cache.store('https://a.example/', 'https://a.example/', {'etag': '"v1"'}, b'x' * 1000)
+
+    assert http_cache.lookup('https://a.example/') is None
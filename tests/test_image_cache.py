@@ -0,0 +1,79 @@
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from linkpreview_cli import ImageCache
+
+
+ORIGINAL_BYTES = 4000
+
+
+def original(seed):
+    return bytes([seed]) * ORIGINAL_BYTES
+
+
+def noise(size=10):
+    return Image.frombytes('RGB', (size, size), os.urandom(size * size * 3))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A time.time() that ticks once per call, so every access has its own LRU position."""
+    now = [time.time()]
+
+    def tick():
+        now[0] += 1
+        return now[0]
+    monkeypatch.setattr(time, 'time', tick)
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ImageCache(str(tmp_path), max_bytes=10_000, store_variants=True)
+    yield cache
+    cache.close()
+
+
+def blob_files(directory):
+    return sorted(name for _, _, names in os.walk(directory) for name in names if not name.startswith('index'))
+
+
+def url_rows(cache):
+    return {url for url, in cache._conn.execute('SELECT url FROM urls')}
+
+
+def test_least_recent_original_goes_with_its_variants(cache, tmp_path):
+    cache.put('https://a.example/banner.jpg', original(1))
+    cache.put('https://a.example/banner.jpg?v=2', original(1))   # Same bytes, stored once
+    cache.put_variant('https://a.example/banner.jpg', 'contain-100x100', noise())
+    cache.put_variant('https://a.example/banner.jpg', 'cover-50x50', noise())
+    cache.put('https://b.example/logo.png', original(2))
+    # Used more recently than the original, but useless without it
+    assert cache.get_variant('https://a.example/banner.jpg', 'cover-50x50') is not None
+
+    cache.put('https://c.example/hero.png', original(3))
+
+    assert cache.get('https://a.example/banner.jpg') is None
+    assert cache.get_variant('https://a.example/banner.jpg', 'cover-50x50') is None
+    assert url_rows(cache) == {'https://b.example/logo.png', 'https://c.example/hero.png'}
+    assert len(blob_files(tmp_path)) == 2
+    assert cache.get('https://b.example/logo.png') == original(2)
+    assert cache.get('https://c.example/hero.png') == original(3)
+
+
+def test_get_keeps_an_original_cached(cache, tmp_path):
+    cache.put('https://a.example/banner.jpg', original(1))
+    cache.put_variant('https://a.example/banner.jpg', 'contain-100x100', noise())
+    cache.put('https://b.example/logo.png', original(2))
+    assert cache.get('https://a.example/banner.jpg') == original(1)
+
+    cache.put('https://c.example/hero.png', original(3))
+
+    # The untouched variant and then the least recently used original are evicted
+    assert cache.get('https://a.example/banner.jpg') == original(1)
+    assert cache.get_variant('https://a.example/banner.jpg', 'contain-100x100') is None
+    assert cache.get('https://b.example/logo.png') is None
+    assert url_rows(cache) == {'https://a.example/banner.jpg', 'https://c.example/hero.png'}
+    assert len(blob_files(tmp_path)) == 2
@@ -0,0 +1,33 @@
+import pytest
+
+from linkpreview_cli import parse_head_tags
+
+
+HEAD = """<!DOCTYPE html>
+<html><head>
+<title>Arrows &amp; angles</title>
+<!-- <meta property="og:title" content="Commented out"> -->
+<script>document.write('<meta property="og:title" content="From a script">');</script>
+<meta property="og:title" content="a > b">
+<meta property="og:description" content='steps: fetch -> parse -> render'>
+<meta name="description" content="x &gt; y &amp;&amp; &quot;quoted&quot;">
+<meta property="og:site_name" content=Bare>
+<link rel="icon" href="/favicon.png?size=32&amp;v=2">
+</head><body></body></html>
+"""
+
+
+@pytest.mark.parametrize('parser', ['html.parser', 'scan'])
+def test_backends_match_lxml(parser):
+    assert parse_head_tags(HEAD, parser=parser) == parse_head_tags(HEAD, parser='lxml')
+
+
+def test_scan_keeps_quoted_angle_brackets():
+    tags = parse_head_tags(HEAD, parser='scan')
+
+    assert tags['title'] == 'Arrows & angles'
+    assert tags['property']['og:title'] == 'a > b'
+    assert tags['property']['og:description'] == 'steps: fetch -> parse -> render'
+    assert tags['name']['description'] == 'x > y && "quoted"'
+    assert tags['property']['og:site_name'] == 'Bare'
+    assert tags['link']['icon'] == '/favicon.png?size=32&v=2'
@@ -0,0 +1,78 @@
+import os
+import re
+
+import pytest
+from PIL import Image, PdfParser
+
+from linkpreview_cli import PDF_PAGE_SIZES, PdfBundle
+
+
+# (url, card width, card height) in the order the URL list gives them
+CARDS = [('a', 100, 40), ('b', 200, 50), ('c', 300, 60), ('d', 400, 70)]
+ARRIVAL = ['c', 'a', 'd', 'b']
+
+
+def write_bundle(path, cards_per_page):
+    sizes = {url: (width, height) for url, width, height in CARDS}
+    bundle = PdfBundle(str(path), cards_per_page=cards_per_page, order=[url for url, *_ in CARDS])
+    for url in ARRIVAL:
+        bundle.add(Image.new('RGB', sizes[url], 'teal'), url=url)
+    return bundle.close()
+
+
+def read_pages(path):
+    """[(MediaBox, [(width, height) of each card in drawing order])] of a PDF."""
+    pdf = PdfParser.PdfParser(str(path))
+    try:
+        pages = []
+        for reference in pdf.pages:
+            page = pdf.read_indirect(reference)
+            images = page[b'Resources'][b'XObject']
+            content = pdf.read_indirect(page[b'Contents']).decode()
+            cards = []
+            for name in re.findall(rb'/(Im\d+) Do', content):
+                image = pdf.read_indirect(images[PdfParser.PdfName(name)]).dictionary
+                cards.append((image[b'Width'], image[b'Height']))
+            pages.append((page[b'MediaBox'], cards))
+        return pages, dict(pdf.xref_table)
+    finally:
+        pdf.close()
+
+
+def assert_offsets_point_at_objects(path, xref):
+    data = path.read_bytes()
+    for number, (offset, _) in xref.items():
+        assert data[offset:].startswith(b'%d 0 obj' % number), f"xref entry of object {number} is off"
+
+
+def test_one_card_per_page_in_url_order(tmp_path):
+    path = tmp_path / 'bundle.pdf'
+    assert write_bundle(path, cards_per_page=1) == len(CARDS)
+
+    pages, xref = read_pages(path)
+    assert len(pages) == len(CARDS)
+    for (media_box, cards), (_, width, height) in zip(pages, CARDS):
+        # A page of the card's own size at 100 dpi
+        assert media_box == pytest.approx([0, 0, width * 0.72, height * 0.72], abs=0.01)
+        assert cards == [(width, height)]
+    assert_offsets_point_at_objects(path, xref)
+
+
+def test_cards_stacked_on_sheets_in_url_order(tmp_path):
+    path = tmp_path / 'bundle.pdf'
+    assert write_bundle(path, cards_per_page=3) == 2
+
+    pages, xref = read_pages(path)
+    sheet = [0, 0, *PDF_PAGE_SIZES['a4']]
+    assert [media_box for media_box, _ in pages] == [sheet, sheet]
+    assert [cards for _, cards in pages] == [[(100, 40), (200, 50), (300, 60)], [(400, 70)]]
+    assert_offsets_point_at_objects(path, xref)
+
+
+def test_empty_bundle_writes_no_file(tmp_path):
+    path = tmp_path / 'bundle.pdf'
+    bundle = PdfBundle(str(path))
+
+    assert bundle.close() == 0
+    assert not os.path.exists(path)
+    assert bundle.close() == 0
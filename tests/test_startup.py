@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+
+# Modules that must not be imported by `import linkpreview_cli` itself
+LAZY_IMPORTS = ('requests', 'urllib3', 'bs4', 'lxml', 'PIL', 'playwright', 'aiohttp', 'asyncio')
+
+# Budget for the fastest of IMPORT_RUNS imports, in milliseconds. The default
+# leaves room for loaded CI runners; set LINKPREVIEW_STARTUP_BUDGET_MS=150 to
+# hold a quiet machine to the target. Eager imports are caught by the lazy
+# import test regardless.
+STARTUP_BUDGET_MS = float(os.environ.get('LINKPREVIEW_STARTUP_BUDGET_MS', 1000))
+IMPORT_RUNS = 5
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_package():
+    """Import linkpreview_cli in a fresh interpreter; returns (milliseconds, eagerly loaded modules)."""
+    code = ("import sys, time; start = time.perf_counter(); import linkpreview_cli; "
+            "print((time.perf_counter() - start) * 1000); "
+            f"print(','.join(m for m in {LAZY_IMPORTS!r} if m in sys.modules))")
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [PACKAGE_ROOT, env.get('PYTHONPATH')]))
+
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, env=env,
+                            check=True)
+    elapsed, loaded = (result.stdout.splitlines() + ['', ''])[:2]
+    return float(elapsed), set(filter(None, loaded.split(',')))
+
+
+def test_heavy_dependencies_are_imported_lazily():
+    _, eager = import_package()
+    assert not eager, f"Imported eagerly, should be lazy: {', '.join(sorted(eager))}"
+
+
+def test_import_time_within_budget():
+    best = min(import_package()[0] for _ in range(IMPORT_RUNS))
+    print(f"Import took {best:.1f} ms")
+    assert best <= STARTUP_BUDGET_MS, f"Import took {best:.1f} ms, budget {STARTUP_BUDGET_MS:g} ms"
+
+
+def test_lazy_names_are_the_real_modules():
+    import requests
+    from PIL import Image
+
+    import linkpreview_cli
+    from linkpreview_cli import Image as exported_image
+
+    assert exported_image is Image
+    assert linkpreview_cli.requests is requests
+    assert isinstance(linkpreview_cli.Image.new('RGB', (1, 1)), Image.Image)